@@ -4,6 +4,7 @@
 import os
 import logging.config
 import sys
+import threading
 import time
 
 from pyail import PyAIL
@@ -60,6 +61,8 @@ class Crawler(AbstractModule):
         self.filter_unsafe_onion = crawlers.is_onion_filter_enabled(cache=False)
         self.filter_unknown_onion = crawlers.is_onion_filter_unknown(cache=False)
         self.last_config_check = int(time.time())
+        # Background lookup of the queued onions
+        self.onions_prefetch = None
 
         self.default_har = config_loader.get_config_boolean('Crawler', 'default_har')
         self.default_screenshot = config_loader.get_config_boolean('Crawler', 'default_screenshot')
@@ -134,6 +137,17 @@ class Crawler(AbstractModule):
         print(f'domain_url:  {domain_url}')
         print()
 
+    def prefetch_queued_onions(self):
+        """
+        Lookup the next queued onions in a background thread, the lookups are cached
+        """
+        if self.onions_prefetch and self.onions_prefetch.is_alive():
+            return
+        onions = crawlers.get_queued_onions()
+        if onions:
+            self.onions_prefetch = threading.Thread(target=crawlers.prefetch_onions_lookup, args=(onions,), daemon=True)
+            self.onions_prefetch.start()
+
     def get_message(self):
         # Crawler Scheduler
         self.crawler_scheduler.update_queue()
@@ -158,6 +172,8 @@ class Crawler(AbstractModule):
                 if self.filter_unsafe_onion:
                     if domain.endswith('.onion'):
                         try:
+                            if not crawlers.is_onion_lookup_cached(domain):
+                                self.prefetch_queued_onions()
                             if not crawlers.check_if_onion_is_safe(domain, unknown=self.filter_unknown_onion):
                                 # print('---------------------------------------------------------')
                                 # print('DOMAIN FILTERED')
@@ -1,11 +1,14 @@
 #!/usr/bin/env python3
 # -*-coding:UTF-8 -*
 
+import math
 import os
+import numpy as np
 import ssdeep
 import sys
 import time
 import tlsh
+import uuid
 
 import datetime
 
@@ -18,6 +21,12 @@ from lib.ConfigLoader import ConfigLoader
 config_loader = ConfigLoader()
 r_serv_db = config_loader.get_db_conn("Kvrocks_Duplicates")
 MIN_ITEM_SIZE = float(config_loader.get_config_str('Modules_Duplicates', 'min_paste_size')) # # TODO: RENAME ME
+THRESHOLDS = {'ssdeep': config_loader.get_config_int('Modules_Duplicates', 'threshold_duplicate_ssdeep'),
+              'tlsh': config_loader.get_config_int('Modules_Duplicates', 'threshold_duplicate_tlsh')}
+if config_loader.has_option('Modules_Duplicates', 'tlsh_index_pivots'):
+    TLSH_INDEX_NB_PIVOTS = config_loader.get_config_int('Modules_Duplicates', 'tlsh_index_pivots')
+else:
+    TLSH_INDEX_NB_PIVOTS = 8
 config_loader = None
 
 #
@@ -42,11 +51,89 @@ def get_ssdeep_hash(content):
 def get_ssdeep_similarity(obj_hash, other_hash):
     return ssdeep.compare(obj_hash, other_hash)
 
+def get_ssdeep_blocksize(ssdeep_hash):
+    return int(ssdeep_hash.split(':', 1)[0])
+
+def group_ssdeep_hashs_by_blocksize(hashs):
+    hashs_by_blocksize = {}
+    for ssdeep_hash in hashs:
+        blocksize = get_ssdeep_blocksize(ssdeep_hash)
+        if blocksize not in hashs_by_blocksize:
+            hashs_by_blocksize[blocksize] = []
+        hashs_by_blocksize[blocksize].append(ssdeep_hash)
+    return hashs_by_blocksize
+
+def get_ssdeep_similarities(obj_hash, hashs_by_blocksize):
+    """
+    Compare a ssdeep hash to a batch of hashs grouped by blocksize.
+    ssdeep can only match hashs with the same, half or double blocksize, the others are skipped.
+
+    :return: list of (hash, similarity)
+    """
+    similarities = []
+    blocksize = get_ssdeep_blocksize(obj_hash)
+    for bs in (blocksize // 2, blocksize, blocksize * 2):
+        for other_hash in hashs_by_blocksize.get(bs, []):
+            similarities.append((other_hash, ssdeep.compare(obj_hash, other_hash)))
+    return similarities
+
 def get_tlsh_hash(content):
     return tlsh.hash(content)
 
+def is_valid_tlsh_hash(tlsh_hash):
+    # content too small or without enough variance
+    return bool(tlsh_hash) and tlsh_hash != 'TNULL'
+
+def get_tlsh_distance(obj_hash, other_hash):
+    return tlsh.diffxlen(obj_hash, other_hash)
+
+# TLSH body distance of two bytes, 4 buckets of 2 bits: |x - y|, 6 if |x - y| == 3
+def _get_tlsh_bytes_diff_table():
+    table = np.zeros((256, 256), dtype=np.uint8)
+    for i in range(256):
+        for j in range(256):
+            x, y, diff = i, j, 0
+            for _ in range(4):
+                d = abs((x & 3) - (y & 3))
+                diff += 6 if d == 3 else d
+                x >>= 2
+                y >>= 2
+            table[i, j] = diff
+    return table
+
+TLSH_BYTES_DIFF = _get_tlsh_bytes_diff_table()
+
+def _unpack_tlsh_hashs(hashs):
+    """
+    :return: uint8 array, one row of 35 bytes by hash: checksum, lvalue, qratios, body
+    """
+    hexs = ''.join(h[2:] if len(h) == 72 else h for h in hashs)  # remove version prefix: T1
+    return np.frombuffer(bytes.fromhex(hexs), dtype=np.uint8).reshape(-1, 35)
+
+def _tlsh_mod_diff(x, y, r):
+    d = np.abs(x.astype(np.int16) - np.int16(y))
+    return np.minimum(d, r - d)
+
+def get_tlsh_distances(obj_hash, other_hashs):
+    """
+    Batch version of tlsh.diffxlen(): distance between obj_hash and each hash of other_hashs
+    """
+    if not other_hashs:
+        return []
+    obj = _unpack_tlsh_hashs([obj_hash])[0]
+    others = _unpack_tlsh_hashs(other_hashs)
+    # checksum
+    diff = (others[:, 0] != obj[0]).astype(np.int32)
+    # q1 and q2 ratios
+    for shift in (4, 0):
+        q_diff = _tlsh_mod_diff(others[:, 2] >> shift & 0xf, obj[2] >> shift & 0xf, 16)
+        diff += np.where(q_diff <= 1, q_diff, (q_diff - 1) * 12)
+    # body
+    diff += TLSH_BYTES_DIFF[obj[3:], others[:, 3:]].sum(axis=1, dtype=np.int32)
+    return diff.tolist()
+
 def get_tlsh_similarity(obj_hash, other_hash):
-    similarity = tlsh.diffxlen(obj_hash, other_hash)
+    similarity = get_tlsh_distance(obj_hash, other_hash)
     if similarity > 100:
         similarity = 100
     similarity = 100 - similarity
@@ -69,34 +156,246 @@ def get_object_id_by_hash(algo, hash, date_ymonth):
 
 def save_object_hash(algo, date_ymonth, hash, obj_id):
     r_serv_db.hset(f'duplicates:hashs:{algo}:{date_ymonth}', hash, obj_id)
+    if algo == 'tlsh':
+        add_tlsh_index(date_ymonth, hash)
+
+# # # # # # # # # # # #
+#                     #
+#     TLSH INDEX      #
+#                     #
+# # # # # # # # # # # #
+
+# Pivot table metric index (LAESA), one per month:
+#   duplicates:index:tlsh:pivots:{date_ymonth}   -> list of pivot hashs
+#   duplicates:index:tlsh:{date_ymonth}:{pivot}  -> zset hash: distance to the pivot
+#   duplicates:index:tlsh:built:{date_ymonth}    -> set once the hashs of the month are indexed, even without any
+#                                                   valid hash
+#
+# The first distinct hashs of the month are used as pivots. As d(q, h) >= |d(q, p) - d(h, p)|, only the hashs with
+# d(h, p) in [d(q, p) - D, d(q, p) + D] for all pivots can be within distance D of a query q.
+# TLSH diff is only approximately a metric, the index returns the same neighbours as a linear scan in practice.
+
+def get_tlsh_index_pivots(date_ymonth):
+    return r_serv_db.lrange(f'duplicates:index:tlsh:pivots:{date_ymonth}', 0, -1)
+
+def get_tlsh_index_members(date_ymonth):
+    return r_serv_db.zrange(f'duplicates:index:tlsh:{date_ymonth}:0', 0, -1)
+
+def get_tlsh_index_size(date_ymonth):
+    return r_serv_db.zcard(f'duplicates:index:tlsh:{date_ymonth}:0')
+
+def exists_tlsh_index(date_ymonth):
+    return r_serv_db.exists(f'duplicates:index:tlsh:built:{date_ymonth}')
+
+def add_tlsh_index(date_ymonth, tlsh_hash):
+    if not is_valid_tlsh_hash(tlsh_hash):
+        return False
+    pivots = get_tlsh_index_pivots(date_ymonth)
+    if tlsh_hash in pivots:
+        return False
+    # New Pivot
+    if len(pivots) < TLSH_INDEX_NB_PIVOTS:
+        members = get_tlsh_index_members(date_ymonth)
+        pivot_id = r_serv_db.rpush(f'duplicates:index:tlsh:pivots:{date_ymonth}', tlsh_hash) - 1
+        if members:
+            distances = get_tlsh_distances(tlsh_hash, members)
+            r_serv_db.zadd(f'duplicates:index:tlsh:{date_ymonth}:{pivot_id}', dict(zip(members, distances)))
+        pivots.append(tlsh_hash)
+
+    pipe = r_serv_db.pipeline()
+    for pivot_id, distance in enumerate(get_tlsh_distances(tlsh_hash, pivots)):
+        pipe.zadd(f'duplicates:index:tlsh:{date_ymonth}:{pivot_id}', {tlsh_hash: distance})
+    pipe.execute()
+    return True
+
+def build_tlsh_index(date_ymonth):
+    """
+    Index the TLSH hashs saved before the index creation
+    """
+    for tlsh_hash in get_algo_hashs_by_month('tlsh', date_ymonth):
+        add_tlsh_index(date_ymonth, tlsh_hash)
+    r_serv_db.set(f'duplicates:index:tlsh:built:{date_ymonth}', 1)
+
+def delete_tlsh_index(date_ymonth):
+    nb_pivots = r_serv_db.llen(f'duplicates:index:tlsh:pivots:{date_ymonth}')
+    for pivot_id in range(nb_pivots):
+        r_serv_db.delete(f'duplicates:index:tlsh:{date_ymonth}:{pivot_id}')
+    r_serv_db.delete(f'duplicates:index:tlsh:pivots:{date_ymonth}')
+    r_serv_db.delete(f'duplicates:index:tlsh:built:{date_ymonth}')
 
+def get_tlsh_neighbours(date_ymonth, tlsh_hash, max_distance):
+    """
+    Get all the TLSH hashs of a month within max_distance of tlsh_hash
 
-def get_obj_duplicates(obj_type, subtype, obj_id):
+    :return: list of (hash, distance)
+    """
+    if not is_valid_tlsh_hash(tlsh_hash):
+        return []
+    if not exists_tlsh_index(date_ymonth):
+        build_tlsh_index(date_ymonth)
+    pivots = get_tlsh_index_pivots(date_ymonth)
+    if not pivots:
+        return []
+
+    windows = []
+    for distance in get_tlsh_distances(tlsh_hash, pivots):
+        windows.append((distance - max_distance, distance + max_distance))
+
+    # Use the most selective pivot to get the candidates
+    pipe = r_serv_db.pipeline()
+    for pivot_id, window in enumerate(windows):
+        pipe.zcount(f'duplicates:index:tlsh:{date_ymonth}:{pivot_id}', window[0], window[1])
+    nb_candidates = pipe.execute()
+    best_pivot = min(range(len(pivots)), key=lambda i: nb_candidates[i])
+    if not nb_candidates[best_pivot]:
+        return []
+    candidates = r_serv_db.zrangebyscore(f'duplicates:index:tlsh:{date_ymonth}:{best_pivot}',
+                                         windows[best_pivot][0], windows[best_pivot][1])
+
+    # Filter candidates with the other pivots
+    for pivot_id, window in enumerate(windows):
+        if pivot_id == best_pivot or not candidates:
+            continue
+        scores = r_serv_db.zmscore(f'duplicates:index:tlsh:{date_ymonth}:{pivot_id}', candidates)
+        candidates = [c for c, score in zip(candidates, scores) if score is None or window[0] <= score <= window[1]]
+
+    neighbours = []
+    for candidate, distance in zip(candidates, get_tlsh_distances(tlsh_hash, candidates)):
+        if distance <= max_distance:
+            neighbours.append((candidate, distance))
+    return neighbours
+
+def get_tlsh_duplicates(tlsh_hash, max_distance, dates_ymonth, obj_id=None):
+    """
+    Get the objects similar to a TLSH hash, same format as get_obj_duplicates()
+    """
+    dict_dup = {}
+    for date_ymonth in dates_ymonth:
+        for neighbour, distance in get_tlsh_neighbours(date_ymonth, tlsh_hash, max_distance):
+            id_2 = get_object_id_by_hash('tlsh', neighbour, date_ymonth)
+            if not id_2 or id_2 == obj_id:
+                continue
+            if id_2 not in dict_dup:
+                dict_dup[id_2] = []
+            dict_dup[id_2].append({'algo': 'tlsh', 'similarity': 100 - min(distance, 100)})
+    return dict_dup
+
+
+def get_obj_duplicates(obj_type, subtype, obj_id, tlsh_hash=None, max_distance=0, nb_months=0):
+    """
+    Get the saved duplicates of an object: the first page of its cluster
+
+    The cluster members are labeled with the cluster id, their similarity is the similarity to the cluster
+    representative, not to the object.
+
+    :param tlsh_hash: optional, also search the TLSH index for the objects within max_distance of this hash
+    :param nb_months: number of months to search in the TLSH index
+    """
     dict_dup = {}
-    duplicates = r_serv_db.smembers(f'obj:duplicates:{obj_type}:{subtype}:{obj_id}')
-    for str_dup in duplicates:
-        similarity, algo, id_2 = str_dup.split(':', 2)
-        if not dict_dup.get(id_2):
-            dict_dup[id_2] = []
-        dict_dup[id_2].append({'algo': algo, 'similarity': int(similarity)})
+    cluster_id = get_obj_cluster(obj_type, subtype, obj_id)
+    if cluster_id:
+        for id_2, algo, similarity in get_cluster_members(cluster_id)['members']:
+            if id_2 != obj_id:
+                dict_dup[id_2] = [{'algo': algo, 'similarity': similarity, 'cluster': cluster_id}]
+    if tlsh_hash:
+        tlsh_dups = get_tlsh_duplicates(tlsh_hash, max_distance, get_last_x_month_dates(nb_months), obj_id=obj_id)
+        for id_2 in tlsh_dups:
+            # The TLSH similarity to the object replaces the similarity to the cluster representative
+            if id_2 not in dict_dup or all('cluster' in dup for dup in dict_dup[id_2]):
+                dict_dup[id_2] = tlsh_dups[id_2]
+            elif not any(dup['algo'] == 'tlsh' for dup in dict_dup[id_2]):
+                dict_dup[id_2].extend(tlsh_dups[id_2])
     return dict_dup
 
-def add_obj_duplicate(algo, similarity, obj_type, subtype, obj_id, id_2):
-    r_serv_db.sadd(f'obj:duplicates:{obj_type}:{subtype}:{obj_id}', f'{similarity}:{algo}:{id_2}')
-
-
-def add_duplicate(algo, hash_, similarity, obj_type, subtype, obj_id, date_ymonth):
-    obj2_id = get_object_id_by_hash(algo, hash_, date_ymonth)
-    # same content
-    if similarity == 100:
-        dups = get_obj_duplicates(obj_type, subtype, obj_id)
-        for dup_id in dups:
-            for algo_dict in dups[dup_id]:
-                if algo_dict['similarity'] == 100 and algo_dict['algo'] == algo:
-                    add_obj_duplicate(algo, similarity, obj_type, subtype, obj_id, dups[dup_id])
-                    add_obj_duplicate(algo, similarity, obj_type, subtype, dups[dup_id], obj_id)
-    add_obj_duplicate(algo, similarity, obj_type, subtype, obj_id, obj2_id)
-    add_obj_duplicate(algo, similarity, obj_type, subtype, obj2_id, obj_id)
+# # # # # # # # # # # #
+#                     #
+#      CLUSTERS       #
+#                     #
+# # # # # # # # # # # #
+
+# Near-duplicate clusters:
+#   duplicates:cluster:{cluster_id}                          -> hash: obj_type, subtype, representative, ssdeep, tlsh
+#   duplicates:cluster:members:{cluster_id}                  -> zset {algo}:{obj_id}: similarity to the representative
+#   obj:duplicates:cluster:{obj_type}:{subtype}:{obj_id}     -> cluster_id
+
+def get_obj_cluster(obj_type, subtype, obj_id):
+    return r_serv_db.get(f'obj:duplicates:cluster:{obj_type}:{subtype}:{obj_id}')
+
+def get_cluster_representative_hashs(cluster_id):
+    ssdeep_hash, tlsh_hash = r_serv_db.hmget(f'duplicates:cluster:{cluster_id}', 'ssdeep', 'tlsh')
+    return {'ssdeep': ssdeep_hash, 'tlsh': tlsh_hash}
+
+def get_cluster_nb_members(cluster_id):
+    return r_serv_db.zcard(f'duplicates:cluster:members:{cluster_id}')
+
+def get_cluster_members(cluster_id, page=1, nb=50):
+    """
+    Get a page of the cluster members, sorted by similarity to the cluster representative
+
+    :return: dict, members: list of (obj_id, algo, similarity)
+    """
+    nb_members = get_cluster_nb_members(cluster_id)
+    nb_pages = max(math.ceil(nb_members / nb), 1)
+    page = min(max(page, 1), nb_pages)
+    start = (page - 1) * nb
+    members = []
+    for member, similarity in r_serv_db.zrevrange(f'duplicates:cluster:members:{cluster_id}', start, start + nb - 1, withscores=True):
+        algo, obj_id = member.split(':', 1)
+        members.append((obj_id, algo, int(similarity)))
+    return {'members': members, 'page': page, 'nb_pages': nb_pages, 'nb': nb_members}
+
+def _add_cluster_member(cluster_id, obj_type, subtype, obj_id, algo, similarity):
+    r_serv_db.set(f'obj:duplicates:cluster:{obj_type}:{subtype}:{obj_id}', cluster_id)
+    r_serv_db.zadd(f'duplicates:cluster:members:{cluster_id}', {f'{algo}:{obj_id}': similarity})
+
+def create_cluster(obj_type, subtype, obj_id, hashs):
+    cluster_id = str(uuid.uuid4())
+    meta = {'obj_type': obj_type, 'subtype': subtype, 'representative': obj_id, 'first_seen': int(time.time())}
+    for algo in hashs:
+        if hashs[algo]:
+            meta[algo] = hashs[algo]
+    r_serv_db.hset(f'duplicates:cluster:{cluster_id}', mapping=meta)
+    algo = 'tlsh' if is_valid_tlsh_hash(hashs.get('tlsh')) else 'ssdeep'
+    _add_cluster_member(cluster_id, obj_type, subtype, obj_id, algo, 100)
+    return cluster_id
+
+def get_cluster_similarity(cluster_id, hashs):
+    """
+    :return: (algo, similarity) with the cluster representative, highest relative to the algo threshold
+    """
+    best = None
+    rep_hashs = get_cluster_representative_hashs(cluster_id)
+    for algo in THRESHOLDS:
+        if not hashs.get(algo) or not rep_hashs.get(algo):
+            continue
+        if algo == 'tlsh' and not (is_valid_tlsh_hash(hashs[algo]) and is_valid_tlsh_hash(rep_hashs[algo])):
+            continue
+        similarity = get_algo_similarity(algo, hashs[algo], rep_hashs[algo])
+        if not best or similarity - THRESHOLDS[algo] > best[1] - THRESHOLDS[best[0]]:
+            best = (algo, similarity)
+    return best
+
+def add_obj_to_cluster(obj_type, subtype, obj_id, hashs, similar_objs):
+    """
+    Assign an object to the cluster of its most similar object, or start a new cluster
+
+    :param hashs: dict, algo: object hash
+    :param similar_objs: dict, obj_id: max similarity (duplicates found by the similarity index)
+    :return: cluster_id
+    """
+    cluster_id = get_obj_cluster(obj_type, subtype, obj_id)
+    if cluster_id:
+        return cluster_id
+    clusters = set()
+    for id_2 in sorted(similar_objs, key=similar_objs.get, reverse=True):
+        cluster_id = get_obj_cluster(obj_type, subtype, id_2)
+        if cluster_id and cluster_id not in clusters:
+            clusters.add(cluster_id)
+            best = get_cluster_similarity(cluster_id, hashs)
+            if best and best[1] >= THRESHOLDS[best[0]]:
+                _add_cluster_member(cluster_id, obj_type, subtype, obj_id, best[0], best[1])
+                return cluster_id
+    return create_cluster(obj_type, subtype, obj_id, hashs)
 
 # TODO
 def delete_obj_duplicates():
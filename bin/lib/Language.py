@@ -1,12 +1,16 @@
 #!/usr/bin/env python3
 # -*-coding:UTF-8 -*
 
+import hashlib
 import os
 import re
 import sys
 import html2text
 
+from concurrent.futures import ThreadPoolExecutor
+
 import gcld3
+import requests
 from lexilang.detector import detect as lexilang_detect
 from libretranslatepy import LibreTranslateAPI
 
@@ -22,6 +26,14 @@ r_lang = config_loader.get_db_conn("Kvrocks_Languages")
 TRANSLATOR_URL = config_loader.get_config_str('Translation', 'libretranslate')
 config_loader = None
 
+# Time to live of the cached languages detections
+DETECTION_TTL = 86400
+# LibreTranslate bulk requests: maximum number of segments and characters by request, concurrent requests
+TRANSLATION_BATCH_SIZE = 50
+TRANSLATION_BATCH_CHARS = 20000
+TRANSLATION_WORKERS = 4
+TRANSLATION_TIMEOUT = 60
+
 
 dict_iso_languages = {
     'af': 'Afrikaans',
@@ -377,7 +389,7 @@ def remove_obj_language(language, obj_type, obj_subtype, obj_id, objs_containers
 
 # TODO handle fields
 def detect_obj_language(obj_type, obj_subtype, obj_id, content, objs_containers=set()):
-    detector = LanguagesDetector(nb_langs=1)
+    detector = get_languages_detector(nb_langs=1)
     language = detector.detect(content)
     if language:
         language = language[0]
@@ -395,27 +407,36 @@ def detect_obj_language(obj_type, obj_subtype, obj_id, content, objs_containers=
 def r_get_obj_translation(obj_global_id, language, field=''):
     return r_lang.hget(f'tr:{obj_global_id}:{field}', language)
 
+def get_objs_translations(objs_global_ids, language, contents, sources=None, field=''):
+    """
+        Translate objects at once: the manual translations are fetched in one round trip,
+        the others contents are translated in bulk
+
+        :return: list of (translation, source language of the translated content, None if manually translated)
+    """
+    pipe = r_lang.pipeline()
+    for obj_global_id in objs_global_ids:
+        pipe.hget(f'tr:{obj_global_id}:{field}', language)
+    translations = [(translation, None) for translation in pipe.execute()]
+    if sources is None:
+        sources = [None] * len(contents)
+    to_translate = [i for i, translation in enumerate(translations) if not translation[0] and contents[i]]
+    if to_translate:
+        translated = LanguageTranslator().translate_batch([contents[i] for i in to_translate],
+                                                          sources=[sources[i] for i in to_translate], target=language)
+        for i, (source, translation) in zip(to_translate, translated):
+            translations[i] = (translation, source)
+    return translations
+
 def _get_obj_translation(obj_global_id, language, source=None, content=None, field='', objs_containers=set()):
     """
         Returns translated content
     """
-    translation = r_cache.get(f'translation:{language}:{obj_global_id}:{field}')
-    r_cache.expire(f'translation:{language}:{obj_global_id}:{field}', 0)
-    if translation:
-        # DEBUG
-        # print('cache')
-        # r_cache.expire(f'translation:{language}:{obj_global_id}:{field}', 0)
-        return translation
     # TODO HANDLE FIELDS TRANSLATION
-    translation = r_get_obj_translation(obj_global_id, language, field=field)
-    if not translation:
-        source, translation = LanguageTranslator().translate(content, source=source, target=language)
-        if source:
-            obj_type, subtype, obj_id = obj_global_id.split(':', 2)
-            add_obj_language(source, obj_type, subtype, obj_id, objs_containers=objs_containers)
-    if translation:
-        r_cache.set(f'translation:{language}:{obj_global_id}:{field}', translation)
-        r_cache.expire(f'translation:{language}:{obj_global_id}:{field}', 300)
+    translation, source = get_objs_translations([obj_global_id], language, [content], sources=[source], field=field)[0]
+    if source:
+        obj_type, subtype, obj_id = obj_global_id.split(':', 2)
+        add_obj_language(source, obj_type, subtype, obj_id, objs_containers=objs_containers)
     return translation
 
 def get_obj_translation(obj_global_id, language, source=None, content=None, field='', objs_containers=set()):
@@ -425,13 +446,24 @@ def get_obj_translation(obj_global_id, language, source=None, content=None, fiel
 # TODO Force to edit ????
 
 def set_obj_translation(obj_global_id, language, translation, field=''):
-    r_cache.delete(f'translation:{language}:{obj_global_id}:')
     return r_lang.hset(f'tr:{obj_global_id}:{field}', language, translation)
 
 def delete_obj_translation(obj_global_id, language, field=''):
-    r_cache.delete(f'translation:{language}:{obj_global_id}:')
     r_lang.hdel(f'tr:{obj_global_id}:{field}', language)
 
+## Translations Store ##
+# Translations by source and target languages and by content digest, shared by all the objects
+# '' if the content can't be translated
+
+def _get_content_digest(content):
+    return hashlib.sha256(content.encode()).hexdigest()
+
+def get_stored_translations(source, target, digests):
+    return r_lang.hmget(f'translations:{source}:{target}', digests)
+
+def store_translations(source, target, translations):
+    r_lang.hset(f'translations:{source}:{target}', mapping=translations)
+
 ## --LANGUAGE ENGINE-- ##
 
 
@@ -495,9 +527,12 @@ class LanguagesDetector:
                     languages.append(language)
         return languages
 
-    def detect(self, content, force_gcld3=False):  # TODO detect length between 20-200 ????
-        if not content:
-            return []
+    def _get_cache_key(self, content):
+        # digest of the whitespace normalized content
+        digest = hashlib.sha256(' '.join(content.split()).encode()).hexdigest()
+        return f'lang:detect:{self.nb_langs}:{self.min_proportion}:{self.min_probability}:{self.min_len}:{digest}'
+
+    def _detect(self, content):  # TODO detect length between 20-200 ????
         content = _clean_text_to_translate(content, html=True)
         if not content:
             return []
@@ -521,11 +556,56 @@ class LanguagesDetector:
             languages = []
         return languages
 
+    def detect(self, content, force_gcld3=False):
+        return self.detect_batch([content], force_gcld3=force_gcld3)[0]
+
+    def detect_batch(self, contents, force_gcld3=False):
+        """
+        Detect the languages of a list of contents, the detections are cached by content digest
+
+        :return: list of languages lists, in the contents order
+        """
+        r_keys = {}
+        for content in contents:
+            if content and content not in r_keys:
+                r_keys[content] = self._get_cache_key(content)
+        detections = {}
+        if r_keys:
+            pipe = r_cache.pipeline()
+            for content, cached in zip(r_keys, r_cache.mget(list(r_keys.values()))):
+                if cached is None:
+                    # same normalized content in the batch
+                    r_key = r_keys[content]
+                    cached = detections.get(r_key)
+                    if cached is None:
+                        cached = ','.join(self._detect(content))
+                        pipe.set(r_key, cached, ex=DETECTION_TTL)
+                detections[r_keys[content]] = cached
+            pipe.execute()
+        languages = []
+        for content in contents:
+            if content and detections[r_keys[content]]:
+                languages.append(detections[r_keys[content]].split(','))
+            else:
+                languages.append([])
+        return languages
+
+DETECTORS = {}
+def get_languages_detector(nb_langs=3, min_proportion=0.2, min_probability=-1, min_len=0):
+    """
+    :return: LanguagesDetector shared by the process, one by settings
+    """
+    settings = (nb_langs, min_proportion, min_probability, min_len)
+    if settings not in DETECTORS:
+        DETECTORS[settings] = LanguagesDetector(nb_langs=nb_langs, min_proportion=min_proportion,
+                                                min_probability=min_probability, min_len=min_len)
+    return DETECTORS[settings]
+
 class LanguageTranslator:
 
     def __init__(self):
         self.lt = LibreTranslateAPI(get_translator_instance())
-        self.ld = LanguagesDetector(nb_langs=1)
+        self.ld = get_languages_detector(nb_langs=1)
 
     def languages(self):
         languages = []
@@ -563,26 +643,105 @@ class LanguageTranslator:
             # print('##############################################################')
             return language[0]
 
-    def translate(self, content, source=None, target="en"):  # TODO source target
+    def _post_translations(self, contents, source, target):
+        """
+        Translate a list of segments in a single request
+
+        :return: list of translations, None on error
+        """
+        params = {'q': contents, 'source': source, 'target': target}
+        if self.lt.api_key is not None:
+            params['api_key'] = self.lt.api_key
+        try:
+            res = requests.post(f'{self.lt.url}translate', json=params, timeout=TRANSLATION_TIMEOUT)
+            res.raise_for_status()
+            translations = res.json()['translatedText']
+        except Exception as e:  # TODO LOG and display error
+            print(f'libretranslate error: {e}')
+            return [None] * len(contents)
+        if not isinstance(translations, list) or len(translations) != len(contents):
+            return [None] * len(contents)
+        return translations
+
+    def _request_translations(self, contents, source, target):
+        # split the segments in bulk requests
+        chunks = []
+        chunk = []
+        nb_chars = 0
+        for content in contents:
+            if chunk and (len(chunk) >= TRANSLATION_BATCH_SIZE or nb_chars + len(content) > TRANSLATION_BATCH_CHARS):
+                chunks.append(chunk)
+                chunk = []
+                nb_chars = 0
+            chunk.append(content)
+            nb_chars += len(content)
+        if chunk:
+            chunks.append(chunk)
+
+        translations = []
+        if len(chunks) == 1:
+            translations = self._post_translations(chunks[0], source, target)
+        else:
+            with ThreadPoolExecutor(max_workers=TRANSLATION_WORKERS) as executor:
+                for chunk_translations in executor.map(lambda c: self._post_translations(c, source, target), chunks):
+                    translations.extend(chunk_translations)
+        return translations
+
+    def _translate_source(self, contents, source, target):
+        """
+        Translate contents of the same language, the translations are stored by content digest
+
+        :return: list of translations, None if not translated
+        """
+        digests = [_get_content_digest(content) for content in contents]
+        translations = dict(zip(digests, get_stored_translations(source, target, digests)))
+        missing = {}
+        for digest, content in zip(digests, contents):
+            if translations[digest] is None:
+                missing[digest] = content
+        if missing:
+            new_translations = {}
+            for (digest, content), translation in zip(missing.items(),
+                                                      self._request_translations(list(missing.values()), source, target)):
+                # request error, retry later
+                if translation is None:
+                    continue
+                if translation == content:
+                    translation = ''
+                new_translations[digest] = translation
+            if new_translations:
+                store_translations(source, target, new_translations)
+                translations.update(new_translations)
+        return [translations[digest] or None for digest in digests]
+
+    def translate_batch(self, contents, sources=None, target="en"):
+        """
+        Translate a list of contents, the undetected sources languages are detected at once
+
+        :return: list of (source, translation)
+        """
+        if sources is None:
+            sources = [None] * len(contents)
         if target not in get_translation_languages():
-            return None
-        translation = None
-        if content:
-            if not source:
-                source = self.detect(content)
-            # print(source, content)
-            if source:
-                if source != target:
-                    try:
-                        # print(content, source, target)
-                        translation = self.lt.translate(content, source, target)
-                    except:
-                        translation = None
-                    # TODO LOG and display error
-                    if translation == content:
-                        # print('EQUAL')
-                        translation = None
-        return source, translation
+            return [(None, None) for _ in contents]
+        sources = list(sources)
+        undetected = [i for i, content in enumerate(contents) if content and not sources[i]]
+        if undetected:
+            for i, languages in zip(undetected, self.ld.detect_batch([contents[i] for i in undetected])):
+                if languages:
+                    sources[i] = languages[0]
+        by_source = {}
+        for i, content in enumerate(contents):
+            if content and sources[i] and sources[i] != target:
+                by_source.setdefault(sources[i], []).append(i)
+        translations = [None] * len(contents)
+        for source, indexes in by_source.items():
+            for i, translation in zip(indexes, self._translate_source([contents[i] for i in indexes], source, target)):
+                translations[i] = translation
+        return list(zip(sources, translations))
+
+    def translate(self, content, source=None, target="en"):  # TODO source target
+        return self.translate_batch([content], sources=[source], target=target)[0]
 
 
 LIST_LANGUAGES = {}
@@ -30,6 +30,82 @@ MODULES_FILE = os.path.join(os.environ['AIL_HOME'], 'configs', 'modules.cfg')
 #             #
 # # # # # # # #
 
+class QueueFilter:
+    """
+    Routing predicates of a subscriber module, defined in configs/modules.cfg:
+        filter_obj_types = item,message     # object types
+        filter_size_min = 1024              # content size range, in bytes (items: gzipped size)
+        filter_size_max = 10000000
+        filter_mimetypes = text/plain       # object mimetypes
+    """
+
+    def __init__(self, module_config_loader, module):
+        self.obj_types = self._get_set(module_config_loader, module, 'filter_obj_types')
+        self.size_min = self._get_int(module_config_loader, module, 'filter_size_min')
+        self.size_max = self._get_int(module_config_loader, module, 'filter_size_max')
+        self.mimetypes = self._get_set(module_config_loader, module, 'filter_mimetypes')
+
+    @staticmethod
+    def _get_set(module_config_loader, module, option):
+        if module_config_loader.has_option(module, option):
+            values = module_config_loader.get_config_str(module, option)
+            return {v.strip() for v in values.split(',') if v.strip()}
+        return set()
+
+    @staticmethod
+    def _get_int(module_config_loader, module, option):
+        if module_config_loader.has_option(module, option):
+            return module_config_loader.get_config_int(module, option)
+        return None
+
+    def is_empty(self):
+        return not (self.obj_types or self.size_min is not None or self.size_max is not None or self.mimetypes)
+
+    def match(self, obj_global_id, obj):
+        """
+        :param obj: AIL object, the size and mimetype predicates are ignored if None
+        """
+        if self.obj_types and obj_global_id.split(':', 1)[0] not in self.obj_types:
+            return False
+        if obj and (self.size_min is not None or self.size_max is not None):
+            size = get_obj_size(obj)
+            if self.size_min is not None and size < self.size_min:
+                return False
+            if self.size_max is not None and size > self.size_max:
+                return False
+        if obj and self.mimetypes:
+            if get_obj_mimetype(obj) not in self.mimetypes:
+                return False
+        return True
+
+# The object size and mimetype are computed once by object instance,
+# for all the messages sent by a module (ex: Categ, one message by category queue)
+
+def _get_obj_size(obj):
+    # Items are stored gzipped, their size is the size of the compressed file
+    if obj.type == 'item':
+        return int(obj.get_size() * 1024)
+    elif obj.type == 'decoded':
+        size = obj.get_size()
+        return int(size) if size else 0
+    content = obj.get_content()
+    if not content:
+        return 0
+    return len(content)
+
+def get_obj_size(obj):
+    size = getattr(obj, '_queue_size', None)
+    if size is None:
+        size = _get_obj_size(obj)
+        obj._queue_size = size
+    return size
+
+def get_obj_mimetype(obj):
+    if not hasattr(obj, '_queue_mimetype'):
+        obj._queue_mimetype = obj.get_mimetype() if hasattr(obj, 'get_mimetype') else None
+    return obj._queue_mimetype
+
+
 class AILQueue:
 
     def __init__(self, module_name, module_pid):
@@ -44,6 +120,7 @@ class AILQueue:
 
     def _set_subscriber(self):
         subscribers = {}
+        filters = {}
         module_config_loader = ConfigLoader(config_file=MODULES_FILE)  # TODO CHECK IF FILE EXISTS
         if not module_config_loader.has_section(self.name):
             raise ModuleQueueError(f'No Section defined for this module: {self.name}. Please add one in configs/module.cfg')
@@ -60,7 +137,11 @@ class AILQueue:
                             queue_name = module_config_loader.get_config_str(module, 'subscribe')
                             if queue_name in subscribers:
                                 subscribers[queue_name].add(module)
+                                queue_filter = QueueFilter(module_config_loader, module)
+                                if not queue_filter.is_empty():
+                                    filters[module] = queue_filter
         self.subscribers_modules = subscribers
+        self.subscribers_filters = filters
 
     def get_out_queues(self):
         return list(self.subscribers_modules.keys())
@@ -101,7 +182,14 @@ class AILQueue:
     def end_message(self, obj_global_id, m_hash):
         end_processed_obj(obj_global_id, m_hash, module=self.name)
 
-    def send_message(self, obj_global_id, message='', queue_name=None):
+    def send_message(self, obj_global_id, message='', queue_name=None, obj=None):
+        self.send_messages(obj_global_id, [message], queue_name=queue_name, obj=obj)
+
+    def send_messages(self, obj_global_id, messages, queue_name=None, obj=None):
+        """
+        Send messages of the same object, the routing predicates are evaluated once
+        and the messages are pushed to each module queue in one round trip
+        """
         if not self.subscribers_modules:
             raise ModuleQueueError('This Module don\'t have any subscriber')
         if queue_name:
@@ -111,22 +199,34 @@ class AILQueue:
             if len(self.subscribers_modules) > 1:
                 raise ModuleQueueError('Queue name required. This module push to multiple queues')
             queue_name = list(self.subscribers_modules)[0]
+        if not messages:
+            return
 
-        message = f'{obj_global_id};{message}'
+        messages = [f'{obj_global_id};{message}' for message in messages]
         if obj_global_id != '::':
-            m_hash = xxhash.xxh3_64_hexdigest(message)
+            m_hashes = [xxhash.xxh3_64_hexdigest(message) for message in messages]
         else:
-            m_hash = None
+            m_hashes = []
 
-        # Add message to all modules
+        # Add messages to all modules
+        modules = []
         for module_name in self.subscribers_modules[queue_name]:
-            if m_hash:
+            # Routing predicates
+            if module_name in self.subscribers_filters:
+                if not self.subscribers_filters[module_name].match(obj_global_id, obj):
+                    continue
+            for m_hash in m_hashes:
                 add_processed_obj(obj_global_id, m_hash, queue=module_name)
-
-            r_queues.rpush(f'queue:{module_name}:in', message)
-            # stats
-            nb_mess = r_queues.llen(f'queue:{module_name}:in')
-            r_queues.hset('queues', module_name, nb_mess)
+            modules.append(module_name)
+        if not modules:
+            return
+
+        pipe = r_queues.pipeline()
+        for module_name in modules:
+            pipe.rpush(f'queue:{module_name}:in', *messages)
+        # stats
+        nb_messages = pipe.execute()
+        r_queues.hset('queues', mapping=dict(zip(modules, nb_messages)))
 
     def start(self):
         r_queues.hset(f'module:start:{self.name}', self.pid, int(time.time()))
@@ -348,6 +348,7 @@ def get_username_meta_from_global_id(username_global_id):
 def list_messages_to_dict(l_messages_id, translation_target=None):
     options = {'content', 'files', 'files-names', 'images', 'language', 'link', 'parent', 'parent_meta', 'reactions', 'thread', 'translation', 'user-account'}
     meta = {}
+    metas = []
     curr_date = None
     for mess_id in l_messages_id:
         message = Messages.Message(mess_id[1:])
@@ -357,8 +358,9 @@ def list_messages_to_dict(l_messages_id, translation_target=None):
         if date_day != curr_date:
             meta[date_day] = []
             curr_date = date_day
-        meta_mess = message.get_meta(options=options, timestamp=timestamp, translation_target=translation_target)
+        meta_mess = message.get_meta(options=options, timestamp=timestamp)
         meta[date_day].append(meta_mess)
+        metas.append(meta_mess)
 
         # if mess_dict.get('tags'):
         #     for tag in mess_dict['tags']:
@@ -366,6 +368,8 @@ def list_messages_to_dict(l_messages_id, translation_target=None):
         #             tags[tag] = 0
         #         tags[tag] += 1
     # return messages, pagination, tags
+    if translation_target:
+        Messages.translate_metas(metas, translation_target)
     return meta
 
 # TODO Filter
@@ -650,7 +654,7 @@ def get_message_report(l_mess): # TODO Force language + translation
 
     for m in l_mess:
         message = Messages.Message(m[2])
-        meta = message.get_meta(options=mess_options, translation_target=translation_target)
+        meta = message.get_meta(options=mess_options)
         if meta['chat'] not in chats:
             chat = Chats.Chat(meta['chat'], message.get_chat_instance())
             meta_chat = chat.get_meta(options=_get_chat_card_meta_options(), translation_target=translation_target)
@@ -665,6 +669,7 @@ def get_message_report(l_mess): # TODO Force language + translation
 
         messages.append(meta)
 
+    Messages.translate_metas(messages, translation_target)
     return chats, messages
 
 # # # # # # # # # # # # # #
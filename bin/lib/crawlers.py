@@ -18,6 +18,7 @@ import sys
 import time
 import uuid
 
+from concurrent.futures import ThreadPoolExecutor
 from enum import IntEnum, unique
 from datetime import datetime, timedelta
 from dateutil.relativedelta import relativedelta
@@ -1881,6 +1882,39 @@ def create_task(url, depth=1, har=True, screenshot=True, header=None, cookiejar=
                             external=external)
     return task_uuid
 
+# Time to live of the recently submitted discovery domains
+DISCOVERY_RECENT_TTL = 3600
+
+def create_tasks(urls, depth=1, har=True, screenshot=True, parent='manual', priority=0):
+    """
+    Create a discovery task by unique domain, skip the domains submitted in the last DISCOVERY_RECENT_TTL seconds
+
+    :return: dict: domain: task uuid (None if not crawled)
+    """
+    domains = {}
+    for url in urls:
+        domain = unpack_url(url)['domain']
+        if domain not in domains:
+            domains[domain] = url
+
+    pipe = r_cache.pipeline()
+    for domain in domains:
+        pipe.get(f'crawler:discovery:recent:{domain}')
+    tasks = {}
+    for domain, task_uuid in zip(domains, pipe.execute()):
+        if task_uuid is not None:
+            tasks[domain] = task_uuid or None
+
+    pipe = r_cache.pipeline()
+    for domain in domains:
+        if domain not in tasks:
+            task_uuid = create_task(domains[domain], depth=depth, har=har, screenshot=screenshot, parent=parent,
+                                    priority=priority)
+            tasks[domain] = task_uuid
+            pipe.setex(f'crawler:discovery:recent:{domain}', DISCOVERY_RECENT_TTL, task_uuid or '')
+    pipe.execute()
+    return tasks
+
 ## -- CRAWLER TASK -- ##
 
 #### CRAWLER TASK API ####
@@ -2304,11 +2338,23 @@ def test_ail_crawlers():
 #                       #
 # # # # # # # # # # # # #
 
+# Time to live of the onion lookups
+ONION_LOOKUP_TTL = 86400
+# Max number of concurrent onion lookups
+ONION_LOOKUP_MAX_WORKERS = 10
+
+onion_lookup_user_agent = None
+
+def _get_onion_lookup_user_agent():
+    global onion_lookup_user_agent
+    if onion_lookup_user_agent is None:
+        commit_id = git_status.get_last_commit_id_from_local()
+        onion_lookup_user_agent = f'AIL-{commit_id}'
+    return onion_lookup_user_agent
+
 def _onion_lookup(onion_url):
     try:
-        commit_id = git_status.get_last_commit_id_from_local()
-        user_agent = f'AIL-{commit_id}'
-        headers = {'User-Agent': user_agent}
+        headers = {'User-Agent': _get_onion_lookup_user_agent()}
         response = requests.get(f'https://onion.ail-project.org/api/lookup/{onion_url}', timeout=10, headers=headers)
         if response.status_code == 200:
             json_response = response.json()
@@ -2321,9 +2367,48 @@ def _onion_lookup(onion_url):
     except requests.exceptions.ReadTimeout:
         return {'error': f'Timeout Error'}
 
+def _is_onion_lookup_error(resp):
+    return isinstance(resp, dict) and 'tags' not in resp and resp.get('error')
 
-def check_if_onion_is_safe(onion_url, unknown):
+def get_onion_lookup(onion_url):
+    """
+    Onion lookup, the responses are cached ONION_LOOKUP_TTL seconds (errors are not cached)
+    """
+    resp = r_cache.get(f'crawler:onion_lookup:{onion_url}')
+    if resp:
+        return json.loads(resp)
     resp = _onion_lookup(onion_url)
+    if not _is_onion_lookup_error(resp):
+        r_cache.setex(f'crawler:onion_lookup:{onion_url}', ONION_LOOKUP_TTL, json.dumps(resp))
+    return resp
+
+def is_onion_lookup_cached(onion_url):
+    return r_cache.exists(f'crawler:onion_lookup:{onion_url}')
+
+def prefetch_onions_lookup(onions_urls):
+    """
+    Lookup concurrently the onions not cached
+    """
+    pipe = r_cache.pipeline()
+    onions_urls = list(dict.fromkeys(onions_urls))
+    for onion_url in onions_urls:
+        pipe.exists(f'crawler:onion_lookup:{onion_url}')
+    to_lookup = [onion_url for onion_url, cached in zip(onions_urls, pipe.execute()) if not cached]
+    if to_lookup:
+        with ThreadPoolExecutor(max_workers=ONION_LOOKUP_MAX_WORKERS) as executor:
+            list(executor.map(get_onion_lookup, to_lookup))
+
+def get_queued_onions(nb=50):
+    """
+    :return: domains of the next onion tasks of the crawler queue
+    """
+    pipe = r_crawler.pipeline()
+    for task_uuid in r_crawler.zrevrange('crawler:queue', 0, nb - 1):
+        pipe.hget(f'crawler:task:{task_uuid}', 'domain')
+    return [domain for domain in pipe.execute() if domain and domain.endswith('.onion')]
+
+def check_if_onion_is_safe(onion_url, unknown):
+    resp = get_onion_lookup(onion_url)
     if resp:
         if isinstance(resp, dict):
             if 'tags' in resp:
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+# -*-coding:UTF-8 -*
+
+"""
+Images Derivatives
+==================
+
+Downscaled copies of the images, screenshots and favicons, created on first use and stored next to the original
+files (<original filename>.<derivative>.webp): thumbnails served to the UI and analysis-size copies read by the
+modules prefilters and by the near-duplicates pixels comparison.
+
+"""
+
+import os
+
+from PIL import Image, ImageChops, ImageFilter, UnidentifiedImageError
+
+# Maximum side of the derivatives
+DERIVATIVES = {'thumbnail': 512, 'analysis': 1024}
+DERIVATIVE_EXTENSION = 'webp'
+DERIVATIVE_QUALITY = 80
+
+# Minimum gradient of an edge pixel
+EDGE_THRESHOLD = 64
+# Minimum number of edge pixels, in the analysis-size copy, of an image containing a text or a code
+MIN_EDGE_PIXELS = 16
+
+# Pixels comparison of two images, side of the compared blocks
+COMPARE_BLOCK_SIZE = 8
+# Maximum mean difference of a block of two identical images (recompressed, resized). A single different character
+# of a text is above 40
+MAX_BLOCK_DIFFERENCE = 24
+
+def get_derivative_filepath(filepath, derivative):
+    return f'{filepath}.{derivative}.{DERIVATIVE_EXTENSION}'
+
+def is_derivative_filepath(filepath):
+    return any(filepath.endswith(f'.{derivative}.{DERIVATIVE_EXTENSION}') for derivative in DERIVATIVES)
+
+def create_derivative(filepath, derivative):
+    """
+    :return: derivative filepath, None if the image can't be decoded
+    """
+    size = DERIVATIVES[derivative]
+    derivative_filepath = get_derivative_filepath(filepath, derivative)
+    tmp_filepath = f'{derivative_filepath}.{os.getpid()}.tmp'
+    try:
+        with Image.open(filepath) as img:
+            # JPEG: decode a downscaled image
+            img.draft('RGB', (size, size))
+            img.thumbnail((size, size), Image.LANCZOS)
+            if img.mode in ('RGBA', 'LA', 'PA') or (img.mode == 'P' and 'transparency' in img.info):
+                img = img.convert('RGBA')
+            elif img.mode != 'RGB':
+                img = img.convert('RGB')
+            img.save(tmp_filepath, 'WEBP', quality=DERIVATIVE_QUALITY)
+        os.replace(tmp_filepath, derivative_filepath)
+    except (OSError, ValueError, UnidentifiedImageError, Image.DecompressionBombError):
+        if os.path.exists(tmp_filepath):
+            os.remove(tmp_filepath)
+        return None
+    return derivative_filepath
+
+def get_derivative(filepath, derivative):
+    """
+    :return: derivative filepath, created on first call, None if the image can't be decoded
+    """
+    derivative_filepath = get_derivative_filepath(filepath, derivative)
+    if os.path.isfile(derivative_filepath):
+        return derivative_filepath
+    return create_derivative(filepath, derivative)
+
+def get_edges_count(image_file):
+    """
+    :return: number of edge pixels, None if the image can't be decoded
+    """
+    try:
+        with Image.open(image_file) as img:
+            edges = img.convert('L').filter(ImageFilter.FIND_EDGES)
+    except (OSError, ValueError, UnidentifiedImageError, Image.DecompressionBombError):
+        return None
+    # ignore the image border
+    edges = edges.crop((1, 1, edges.width - 1, edges.height - 1))
+    return edges.point(lambda p: 255 if p > EDGE_THRESHOLD else 0).histogram()[255]
+
+def has_details(filepath):
+    """
+    Cheap prefilter of the OCR and codes extraction: flat or blurry images don't contain texts or codes
+
+    :return: False if the analysis-size copy of the image doesn't have enough edges
+    """
+    derivative_filepath = get_derivative(filepath, 'analysis')
+    if not derivative_filepath:
+        # let the extractors handle the undecodable images
+        return True
+    edges = get_edges_count(derivative_filepath)
+    return edges is None or edges >= MIN_EDGE_PIXELS
+
+def is_same_image(filepath1, filepath2):
+    """
+    Strong check of two near-duplicates (same perceptual hash): compare the pixels of the analysis-size copies by
+    blocks, a difference of text, QR code or barcode content is detected
+
+    :return: True if the images only differ by their compression or size
+    """
+    images = []
+    for filepath in (filepath1, filepath2):
+        derivative_filepath = get_derivative(filepath, 'analysis')
+        if not derivative_filepath:
+            return False
+        try:
+            with Image.open(derivative_filepath) as img:
+                images.append(img.convert('L'))
+        except (OSError, ValueError, UnidentifiedImageError, Image.DecompressionBombError):
+            return False
+    size = (min(images[0].width, images[1].width), min(images[0].height, images[1].height))
+    img1, img2 = (img.resize(size, Image.LANCZOS) for img in images)
+    diff = ImageChops.difference(img1, img2)
+    # mean difference by block
+    blocks = diff.resize((max(1, size[0] // COMPARE_BLOCK_SIZE), max(1, size[1] // COMPARE_BLOCK_SIZE)), Image.BOX)
+    return blocks.getextrema()[1] <= MAX_BLOCK_DIFFERENCE
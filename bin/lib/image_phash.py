@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+# -*-coding:UTF-8 -*
+
+"""
+Images Perceptual Hashes
+========================
+
+64 bits difference hash (dHash) of the images and screenshots, used to find the visually identical images
+(recompressed, resized) and reuse their OCR and barcodes results. The hash doesn't distinguish two texts with the same
+layout: the candidates must be checked with image_derivatives.is_same_image() before reusing their results.
+
+The hashes are indexed by 16 bits bands: two hashes with a hamming distance <= 3 share at least one band.
+Near-duplicates must also have the same aspect ratio, flat images (blank, single color) are not hashed.
+The bands shared by too many images (common patterns) are not searched.
+
+"""
+
+import os
+import sys
+
+from PIL import Image, UnidentifiedImageError
+
+sys.path.append(os.environ['AIL_BIN'])
+##################################
+# Import Project packages
+##################################
+from lib.ConfigLoader import ConfigLoader
+
+config_loader = ConfigLoader()
+r_object = config_loader.get_db_conn("Kvrocks_Objects")
+config_loader = None
+
+HASH_SIZE = 8
+NB_BANDS = 4
+BAND_BITS = 64 // NB_BANDS
+# Maximum hamming distance of two visually identical images
+MAX_DISTANCE = NB_BANDS - 1
+ASPECT_RATIO_TOLERANCE = 0.02
+# Minimum grayscale range of the downscaled image
+MIN_CONTRAST = 8
+# Maximum number of hashes of a searched band
+MAX_BAND_SIZE = 1000
+
+def compute_dhash(image_file):
+    """
+    :param image_file: filepath or file object
+    :return: (dhash, width, height), None if the image can't be decoded or is flat
+    """
+    try:
+        with Image.open(image_file) as img:
+            width, height = img.size
+            # JPEG: decode a downscaled image
+            img.draft('L', (HASH_SIZE * 8, HASH_SIZE * 8))
+            img = img.convert('L').resize((HASH_SIZE + 1, HASH_SIZE), Image.LANCZOS)
+            pixels = list(img.getdata())
+    except (OSError, ValueError, UnidentifiedImageError, Image.DecompressionBombError):
+        return None
+    if max(pixels) - min(pixels) < MIN_CONTRAST:
+        return None
+    dhash = 0
+    for y in range(HASH_SIZE):
+        row = pixels[y * (HASH_SIZE + 1):(y + 1) * (HASH_SIZE + 1)]
+        for x in range(HASH_SIZE):
+            dhash = (dhash << 1) | (row[x] > row[x + 1])
+    return dhash, width, height
+
+def pack_phash(dhash, width, height):
+    return f'{dhash:016x}:{width}:{height}'
+
+def unpack_phash(phash):
+    """
+    :return: (dhash, width, height), None if the image isn't hashed
+    """
+    if not phash:
+        return None
+    dhash, width, height = phash.split(':')
+    return int(dhash, 16), int(width), int(height)
+
+def _get_bands(dhash):
+    return [(i, (dhash >> (i * BAND_BITS)) & ((1 << BAND_BITS) - 1)) for i in range(NB_BANDS)]
+
+def create_phash(obj_global_id, image_file):
+    """
+    Compute and index the perceptual hash of an image
+
+    :return: packed perceptual hash, '' if the image can't be decoded or is flat
+    """
+    computed = compute_dhash(image_file)
+    if not computed:
+        return ''
+    phash = pack_phash(*computed)
+    pipe = r_object.pipeline()
+    for i, band in _get_bands(computed[0]):
+        pipe.sadd(f'phash:{i}:{band:04x}', f'{phash}:{obj_global_id}')
+    pipe.execute()
+    return phash
+
+def delete_phash(obj_global_id, phash):
+    """
+    Remove an image from the perceptual hashes index
+
+    :param phash: packed perceptual hash
+    """
+    if not phash:
+        return None
+    dhash = unpack_phash(phash)[0]
+    pipe = r_object.pipeline()
+    for i, band in _get_bands(dhash):
+        pipe.srem(f'phash:{i}:{band:04x}', f'{phash}:{obj_global_id}')
+    pipe.execute()
+
+def get_near_duplicates(obj_global_id, phash, max_distance=MAX_DISTANCE, obj_types=None):
+    """
+    :param phash: (dhash, width, height)
+    :return: list of (object global id, hamming distance, width, height), sorted by distance
+    """
+    dhash, width, height = phash
+    bands = [f'phash:{i}:{band:04x}' for i, band in _get_bands(dhash)]
+    pipe = r_object.pipeline()
+    for band in bands:
+        pipe.scard(band)
+    # Skip the saturated bands
+    bands = [band for band, nb in zip(bands, pipe.execute()) if nb <= MAX_BAND_SIZE]
+    if not bands:
+        return []
+    candidates = r_object.sunion(bands)
+    duplicates = {}
+    for candidate in candidates:
+        candidate_hash, candidate_width, candidate_height, candidate_id = candidate.split(':', 3)
+        if candidate_id == obj_global_id:
+            continue
+        if obj_types and candidate_id.split(':', 1)[0] not in obj_types:
+            continue
+        distance = bin(dhash ^ int(candidate_hash, 16)).count('1')
+        if distance > max_distance:
+            continue
+        candidate_width, candidate_height = int(candidate_width), int(candidate_height)
+        if abs(width * candidate_height - candidate_width * height) > ASPECT_RATIO_TOLERANCE * width * candidate_height:
+            continue
+        duplicates[candidate_id] = (candidate_id, distance, candidate_width, candidate_height)
+    return sorted(duplicates.values(), key=lambda x: x[1])
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+# -*-coding:UTF-8 -*
+
+"""
+Numeric Tokens
+==============
+
+Linear prefilters of the numbers modules (CreditCards, Iban, Phone).
+
+Each prefilter finds, in one pass, the candidate tokens of an object content: the detection regexes and the
+validations (Luhn, IBAN checksum, phone number) then run in-process on the candidates only.
+
+"""
+
+import re
+
+# Digits with a single space or dash separator
+DIGITS_RUN_REGEX = re.compile(r'[0-9](?:[ \-]?[0-9])*')
+# IBAN country code and check digits
+IBAN_PREFIX_REGEX = re.compile(r'\b[A-Za-z]{2}[ \-]?[0-9]{2}')
+# International phone numbers: a plus sign followed by a digit
+PHONE_PREFIX_REGEX = re.compile(r'[+＋][^\w\n]{0,3}\d')
+
+# Context of a phone number candidate, extended to the nearest whitespace
+PHONE_WINDOW_BEFORE = 32
+PHONE_WINDOW_AFTER = 96
+
+def get_digits_runs(content, min_digits):
+    """
+    :return: list of (start, end) of the digits runs with at least min_digits digits
+    """
+    runs = []
+    for match in DIGITS_RUN_REGEX.finditer(content):
+        start, end = match.span()
+        if end - start >= min_digits:
+            run = match.group()
+            if end - start - run.count(' ') - run.count('-') >= min_digits:
+                runs.append((start, end))
+    return runs
+
+def finditer_spans(regex, content, spans):
+    """
+    Search a regex in some spans of the content, the regex matches must be contained in the spans.
+    The characters surrounding the spans are kept: word boundaries and lookarounds are checked against the content.
+
+    :return: list of (start, end, value)
+    """
+    matches = []
+    for start, end in spans:
+        for match in regex.finditer(content, start, min(end + 1, len(content))):
+            if match.end() <= end:
+                matches.append((match.start(), match.end(), match.group()))
+    return matches
+
+def get_iban_starts(content):
+    """
+    :return: list of the offsets of the IBAN candidates
+    """
+    return [match.start() for match in IBAN_PREFIX_REGEX.finditer(content)]
+
+def get_phone_windows(content):
+    """
+    :return: list of (start, end) of the content windows containing an international phone number candidate
+    """
+    windows = []
+    len_content = len(content)
+    for match in PHONE_PREFIX_REGEX.finditer(content):
+        plus = match.start()
+        start = max(0, plus - PHONE_WINDOW_BEFORE)
+        while start > 0 and not content[start - 1].isspace() and plus - start < PHONE_WINDOW_BEFORE * 2:
+            start -= 1
+        end = min(len_content, plus + PHONE_WINDOW_AFTER)
+        while end < len_content and not content[end].isspace() and end - plus < PHONE_WINDOW_AFTER * 2:
+            end += 1
+        # merge overlapping windows
+        if windows and start <= windows[-1][1]:
+            windows[-1][1] = max(windows[-1][1], end)
+        else:
+            windows.append([start, end])
+    return [(start, end) for start, end in windows]
@@ -15,6 +15,7 @@ sys.path.append(os.environ['AIL_BIN'])
 ##################################
 # Import Project packages
 ##################################
+from lib import image_derivatives
 from lib.ConfigLoader import ConfigLoader
 from lib.objects.abstract_daterange_object import AbstractDaterangeObject, AbstractDaterangeObjects
 
@@ -62,6 +63,14 @@ class Favicon(AbstractDaterangeObject):
         filename = os.path.join(FAVICON_FOLDER, self.get_rel_path())
         return os.path.realpath(filename)
 
+    def get_derivative(self, derivative):
+        """
+        Downscaled copy of the favicon, see lib.image_derivatives.DERIVATIVES
+
+        :return: derivative filepath, None if the favicon can't be decoded
+        """
+        return image_derivatives.get_derivative(self.get_filepath(), derivative)
+
     def get_file_content(self, r_type='str'):
         filepath = self.get_filepath()
         if r_type == 'str':
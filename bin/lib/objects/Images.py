@@ -16,6 +16,8 @@ sys.path.append(os.environ['AIL_BIN'])
 ##################################
 # Import Project packages
 ##################################
+from lib import image_derivatives
+from lib import image_phash
 from lib.ConfigLoader import ConfigLoader
 from lib.objects.abstract_daterange_object import AbstractDaterangeObject, AbstractDaterangeObjects
 
@@ -42,7 +44,7 @@ class Image(AbstractDaterangeObject):
     # # WARNING: UNCLEAN DELETE /!\ TEST ONLY /!\
     def delete(self):
         # # TODO:
-        pass
+        image_phash.delete_phash(self.get_global_id(), self._get_field('phash'))
 
     def exists(self):
         return os.path.isfile(self.get_filepath())
@@ -85,6 +87,35 @@ class Image(AbstractDaterangeObject):
         else:
             return self.get_file_content()
 
+    def get_derivative(self, derivative):
+        """
+        Downscaled copy of the image, see lib.image_derivatives.DERIVATIVES
+
+        :return: derivative filepath, None if the image can't be decoded
+        """
+        return image_derivatives.get_derivative(self.get_filepath(), derivative)
+
+    def get_phash(self):
+        """
+        Perceptual hash, computed and indexed on first call
+
+        :return: (dhash, width, height), None if the image can't be decoded or is flat
+        """
+        phash = self._get_field('phash')
+        if phash is None:
+            phash = image_phash.create_phash(self.get_global_id(), self.get_filepath())
+            self._set_field('phash', phash)
+        return image_phash.unpack_phash(phash)
+
+    def get_near_duplicates(self, obj_types=None):
+        """
+        :return: list of the visually identical images: (object global id, hamming distance, width, height)
+        """
+        phash = self.get_phash()
+        if not phash:
+            return []
+        return image_phash.get_near_duplicates(self.get_global_id(), phash, obj_types=obj_types)
+
     def get_misp_object(self):
         obj_attrs = []
         obj = MISPObject('file')
@@ -122,6 +153,8 @@ def get_all_images():
     images = []
     for root, dirs, files in os.walk(get_screenshot_dir()):
         for file in files:
+            if image_derivatives.is_derivative_filepath(file):
+                continue
             path = f'{root}{file}'
             image_id = path.replace(IMAGE_FOLDER, '').replace('/', '')
             images.append(image_id)
@@ -142,6 +175,7 @@ def create(content, size_limit=5000000, b64=False, force=False):
         image = Image(image_id)
         if not image.exists():
             image.create(content)
+            image.get_phash()
         return image
 
 
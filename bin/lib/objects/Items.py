@@ -22,7 +22,7 @@ from lib.ail_core import get_ail_uuid, rreplace
 from lib.objects.abstract_object import AbstractObject
 from lib.ConfigLoader import ConfigLoader
 from lib import item_basic
-from lib.Language import LanguagesDetector
+from lib.Language import get_languages_detector
 from lib.data_retention_engine import update_obj_date, get_obj_date_first
 from packages import Date
 
@@ -334,7 +334,7 @@ class Item(AbstractObject):
 
     # TODO RENAME ME
     def get_languages(self, min_len=600, num_langs=3, min_proportion=0.2, min_probability=0.7, force_gcld3=False):
-        ld = LanguagesDetector(nb_langs=num_langs, min_proportion=min_proportion, min_probability=min_probability, min_len=min_len)
+        ld = get_languages_detector(nb_langs=num_langs, min_proportion=min_proportion, min_probability=min_probability, min_len=min_len)
         return ld.detect(self.get_content(), force_gcld3=force_gcld3)
 
     def get_mimetype(self, content=None):
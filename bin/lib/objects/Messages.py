@@ -437,6 +437,27 @@ def create(obj_id, content, translation=None, tags=[]):
     message.create(content, translation=translation, tags=tags)
     return message
 
+def translate_metas(metas, translation_target):
+    """
+    Translate messages metas at once, the replies included
+
+    :param metas: list of messages metas, get_meta() with the content and language options
+    """
+    to_translate = []
+    for meta in metas:
+        to_translate.append(meta)
+        if meta.get('reply_to'):
+            to_translate.append(meta['reply_to'])
+    messages = [Message(meta['id']) for meta in to_translate]
+    translations = Language.get_objs_translations([message.get_global_id() for message in messages], translation_target,
+                                                  [meta.get('content') for meta in to_translate],
+                                                  sources=[meta.get('language') for meta in to_translate])
+    for message, meta, (translation, source) in zip(messages, to_translate, translations):
+        meta['translation'] = translation
+        if source and source != meta.get('language'):
+            message.add_language(source)
+            meta['language'] = message.get_language()
+
 # TODO Encode translation
 
 
@@ -1,15 +1,18 @@
 #!/usr/bin/env python3
 # -*-coding:UTF-8 -*
 
+import json
 import os
 import sys
 
+from collections import OrderedDict
 from datetime import datetime
 from io import BytesIO
 from PIL import Image
 from PIL import ImageDraw
 
 from pymisp import MISPObject
+from redis.exceptions import WatchError
 
 sys.path.append(os.environ['AIL_BIN'])
 ##################################
@@ -24,7 +27,6 @@ from packages import Date
 from flask import url_for
 
 config_loader = ConfigLoader()
-r_cache = config_loader.get_redis_conn("Redis_Cache")
 r_object = config_loader.get_db_conn("Kvrocks_Objects")
 baseurl = config_loader.get_config_str("Notifications", "ail_domain")
 IMAGE_FOLDER = config_loader.get_files_directory('images')
@@ -47,38 +49,9 @@ class Ocr(AbstractDaterangeObject):
         """
         Returns content
         """
-        global_id = self.get_global_id()
-        content = r_cache.get(f'content:{global_id}')
-        if not content:
-            dict_content = {}
-            for extracted in r_object.smembers(f'ocr:{self.id}'):
-                extracted = extracted.split(':', 4)
-                x, y = extracted[0].split(',', 1)
-                # get text line, y +- 20
-                rounded_y = round(int(y) / 20) * 20
-                if rounded_y not in dict_content:
-                    dict_content[rounded_y] = []
-                dict_content[rounded_y].append((int(x), int(y), extracted[-1]))
-
-            content = ''
-            new_line = True
-            l_key = sorted(dict_content.keys())
-            for key in l_key:
-                dict_content[key] = sorted(dict_content[key], key=lambda c: c[0])
-                for text in dict_content[key]:
-                    if new_line:
-                        content = f'{content}{text[2]}'
-                        new_line = False
-                    else:
-                        content = f'{content}      {text[2]}'
-                content = f'{content}\n'
-                new_line = True
-
-            # Set Cache
-            if content:
-                global_id = self.get_global_id()
-                r_cache.set(f'content:{global_id}', content)
-                r_cache.expire(f'content:{global_id}', 300)
+        content = self._get_field('content')
+        if content is None:
+            content = self._materialize()[0]
 
         if r_type == 'str':
             return content
@@ -197,37 +170,104 @@ class Ocr(AbstractDaterangeObject):
     def _unpack_coord(self, coord):
         return coord.split(',', 1)
 
-    def get_coords(self):
-        coords = []
-        for extracted in r_object.smembers(f'ocr:{self.id}'):
-            coord = []
-            bbox = extracted.split(':', 4)[:-1]
-            for c in bbox:
+    def _get_extracted_detections(self, r_db=r_object):
+        detections = []
+        for extracted in r_db.smembers(f'ocr:{self.id}'):
+            extract = extracted.split(':', 4)
+            bbox = []
+            for c in extract[:4]:
                 x, y = self._unpack_coord(c)
-                coord.append((int(x), int(y)))
-            coords.append(coord)
-        return coords
+                bbox.append((int(x), int(y)))
+            detections.append((bbox, extract[4]))
+        return detections
+
+    @staticmethod
+    def _render_content(detections):
+        dict_content = {}
+        for bbox, text in detections:
+            x, y = bbox[0]
+            # get text line, y +- 20
+            rounded_y = round(y / 20) * 20
+            if rounded_y not in dict_content:
+                dict_content[rounded_y] = []
+            dict_content[rounded_y].append((x, y, text))
+
+        content = ''
+        new_line = True
+        l_key = sorted(dict_content.keys())
+        for key in l_key:
+            dict_content[key] = sorted(dict_content[key], key=lambda c: c[0])
+            for text in dict_content[key]:
+                if new_line:
+                    content = f'{content}{text[2]}'
+                    new_line = False
+                else:
+                    content = f'{content}      {text[2]}'
+            content = f'{content}\n'
+            new_line = True
+        return content
+
+    def _materialize(self):
+        """
+        Render the text and parse the coordinates of the extracted texts once, invalidated on texts edition
+
+        :return: content, detections
+        """
+        with r_object.pipeline() as pipe:
+            # Texts edited after the read: don't save the stale text
+            pipe.watch(f'ocr:{self.id}')
+            detections = self._get_extracted_detections(r_db=pipe)
+            content = self._render_content(detections)
+            if detections:
+                pipe.multi()
+                pipe.hset(f'meta:{self.type}:{self.id}',
+                          mapping={'content': content, 'detections': json.dumps(detections)})
+                try:
+                    pipe.execute()
+                except WatchError:
+                    pass
+        return content, detections
+
+    def _invalidate(self, pipe):
+        pipe.hdel(f'meta:{self.type}:{self.id}', 'content', 'detections')
+
+    def get_detections(self):
+        """
+        :return: list of (bbox, text)
+        """
+        detections = self._get_field('detections')
+        if detections is None:
+            return self._materialize()[1]
+        return [([tuple(c) for c in bbox], text) for bbox, text in json.loads(detections)]
+
+    def get_coords(self):
+        return [bbox for bbox, _ in self.get_detections()]
 
     def get_img_map_coords(self):
         coords = []
-        for extracted in r_object.smembers(f'ocr:{self.id}'):
-            extract = extracted.split(':', 4)
-            x1, y1 = self._unpack_coord(extract[0])
-            x2, y2 = self._unpack_coord(extract[1])
-            x3, y3 = self._unpack_coord(extract[2])
-            x4, y4 = self._unpack_coord(extract[3])
-            coords.append((f'{x1},{y1},{x2},{y2},{x3},{y3},{x4},{y4}', extract[4]))
+        for bbox, text in self.get_detections():
+            coords.append((','.join(f'{x},{y}' for x, y in bbox), text))
         return coords
 
     def edit_text(self, coordinates, text, new_text, new_coordinates=None):
-        pass
+        if not new_coordinates:
+            new_coordinates = coordinates
+        self.remove_text(f'{coordinates}:{text}')
+        return self.add_text(new_coordinates, new_text)
 
     def add_text(self, coordinates, text):
         val = f'{coordinates}:{text}'
-        return r_object.sadd(f'ocr:{self.id}', val)
+        # Edit the texts and invalidate the materialized text at once
+        pipe = r_object.pipeline(transaction=True)
+        pipe.sadd(f'ocr:{self.id}', val)
+        self._invalidate(pipe)
+        return pipe.execute()[0]
 
     def remove_text(self, val):
-        return r_object.srem(f'ocr:{self.id}', val)
+        pipe = r_object.pipeline(transaction=True)
+        pipe.srem(f'ocr:{self.id}', val)
+        self._invalidate(pipe)
+        return pipe.execute()[0]
 
     def update_correlation(self, date=None):
         if date:
@@ -250,6 +290,8 @@ class Ocr(AbstractDaterangeObject):
                 created = True
 
         if created:
+            self._materialize()
+
             # Correlations
             self._copy_from('image', self.id)
             self.update_correlation()
@@ -285,10 +327,60 @@ def create(obj_id, detections, tags=[]):
         if obj_id:
             return obj
 
-# TODO preload languages
-def extract_text(image_path, languages, threshold=0.2):
-    import easyocr
-    reader = easyocr.Reader(languages, verbose=False)
+class OcrReaders:
+    """
+    LRU pool of EasyOCR readers by languages set.
+
+    Creating a reader loads the detection and recognition models weights, the readers are kept loaded
+    until the memory used by their weights reaches max_memory (MB).
+    """
+
+    def __init__(self, max_memory=2048):
+        self.max_memory = max_memory * 1024 * 1024
+        self.memory = 0
+        # languages: (reader, size)
+        self.readers = OrderedDict()
+
+    @staticmethod
+    def _get_reader_size(reader):
+        size = 0
+        for model in (getattr(reader, 'detector', None), getattr(reader, 'recognizer', None)):
+            if model is not None and hasattr(model, 'parameters'):
+                size += sum(param.numel() * param.element_size() for param in model.parameters())
+        return size
+
+    def get_reader(self, languages):
+        languages = tuple(sorted(languages))
+        if languages in self.readers:
+            self.readers.move_to_end(languages)
+            return self.readers[languages][0]
+
+        import easyocr
+        reader = easyocr.Reader(list(languages), verbose=False)
+        size = self._get_reader_size(reader)
+        self.readers[languages] = (reader, size)
+        self.memory += size
+        # Remove the least recently used readers, keep the new one
+        while self.memory > self.max_memory and len(self.readers) > 1:
+            _, (_, old_size) = self.readers.popitem(last=False)
+            self.memory -= old_size
+        return reader
+
+    def warmup(self, languages_sets):
+        for languages in languages_sets:
+            if languages:
+                self.get_reader(languages)
+
+
+def extract_text(image_path, languages, threshold=0.2, readers=None):
+    """
+    :param readers: OcrReaders pool, a new reader is created if None
+    """
+    if readers:
+        reader = readers.get_reader(languages)
+    else:
+        import easyocr
+        reader = easyocr.Reader(languages, verbose=False)
     texts = reader.readtext(image_path)
     # print(texts)
     extracted = []
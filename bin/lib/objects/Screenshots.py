@@ -15,6 +15,8 @@ sys.path.append(os.environ['AIL_BIN'])
 ##################################
 # Import Project packages
 ##################################
+from lib import image_derivatives
+from lib import image_phash
 from lib.ConfigLoader import ConfigLoader
 from lib.objects.abstract_object import AbstractObject
 # from lib import data_retention_engine
@@ -42,7 +44,7 @@ class Screenshot(AbstractObject):
     # # WARNING: UNCLEAN DELETE /!\ TEST ONLY /!\
     def delete(self):
         # # TODO:
-        pass
+        image_phash.delete_phash(self.get_global_id(), self._get_field('phash'))
 
     def exists(self):
         return os.path.isfile(self.get_filepath())
@@ -92,6 +94,35 @@ class Screenshot(AbstractObject):
     def get_content(self):
         return self.get_file_content()
 
+    def get_derivative(self, derivative):
+        """
+        Downscaled copy of the screenshot, see lib.image_derivatives.DERIVATIVES
+
+        :return: derivative filepath, None if the screenshot can't be decoded
+        """
+        return image_derivatives.get_derivative(self.get_filepath(), derivative)
+
+    def get_phash(self):
+        """
+        Perceptual hash, computed and indexed on first call
+
+        :return: (dhash, width, height), None if the image can't be decoded or is flat
+        """
+        phash = self._get_field('phash')
+        if phash is None:
+            phash = image_phash.create_phash(self.get_global_id(), self.get_filepath())
+            self._set_field('phash', phash)
+        return image_phash.unpack_phash(phash)
+
+    def get_near_duplicates(self, obj_types=None):
+        """
+        :return: list of the visually identical images: (object global id, hamming distance, width, height)
+        """
+        phash = self.get_phash()
+        if not phash:
+            return []
+        return image_phash.get_near_duplicates(self.get_global_id(), phash, obj_types=obj_types)
+
     def get_misp_object(self):
         obj_attrs = []
         obj = MISPObject('file')
@@ -127,6 +158,8 @@ def get_all_screenshots():
     screenshot_dir = os.path.join(os.environ['AIL_HOME'], SCREENSHOT_FOLDER)
     for root, dirs, files in os.walk(screenshot_dir):
         for file in files:
+            if image_derivatives.is_derivative_filepath(file):
+                continue
             screenshot_path = f'{root}{file}'
             screenshot_id = screenshot_path.replace(SCREENSHOT_FOLDER, '').replace('/', '')[:-4]
             screenshots.append(screenshot_id)
@@ -136,6 +169,8 @@ def get_screenshots_obj_iterator(filters=[]):
     screenshot_dir = os.path.join(os.environ['AIL_HOME'], SCREENSHOT_FOLDER)
     for root, dirs, files in os.walk(screenshot_dir):
         for file in files:
+            if image_derivatives.is_derivative_filepath(file):
+                continue
             screenshot_path = f'{root}{file}'
             screenshot_id = screenshot_path.replace(SCREENSHOT_FOLDER, '').replace('/', '')[:-4]
             yield Screenshot(screenshot_id)
@@ -155,6 +190,7 @@ def create_screenshot(content, size_limit=5000000, b64=True, force=False):
                 os.makedirs(dirname)
             with open(filepath, 'wb') as f:
                 f.write(content)
+            screenshot.get_phash()
         return screenshot
     return  None
 
@@ -298,20 +298,25 @@ class AbstractChatObject(AbstractSubtypeObject, ABC):
             except TypeError:
                 page = 1
         mess, pagination = self._get_messages(nb=nb, page=page)
+        metas = []
         for message in mess:
             timestamp = message[1]
             date_day = datetime.utcfromtimestamp(timestamp).strftime('%Y/%m/%d')
             if date_day != curr_date:
                 messages[date_day] = []
                 curr_date = date_day
-            mess_dict = self.get_message_meta(message[0], timestamp=timestamp, translation_target=translation_target, options=options)
+            # the messages of the page are translated at once
+            mess_dict = self.get_message_meta(message[0], timestamp=timestamp, options=options)
             messages[date_day].append(mess_dict)
+            metas.append(mess_dict)
 
             if mess_dict.get('tags'):
                 for tag in mess_dict['tags']:
                     if tag not in tags:
                         tags[tag] = 0
                     tags[tag] += 1
+        if translation_target and (not options or 'translation' in options):
+            Messages.translate_metas(metas, translation_target)
         return messages, pagination, tags
 
     # TODO REWRITE ADD OR ADD MESSAGE ????
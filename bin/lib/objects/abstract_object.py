@@ -137,9 +137,6 @@ class AbstractObject(ABC):
     ## Duplicates ##
     def get_duplicates(self):
         return Duplicate.get_obj_duplicates(self.type, self.get_subtype(r_str=True), self.id)
-
-    def add_duplicate(self, algo, similarity, id_2):
-        return Duplicate.add_obj_duplicate(algo, similarity, self.type, self.get_subtype(r_str=True), self.id, id_2)
     ## -Duplicates- ##
 
     ## Investigations ##
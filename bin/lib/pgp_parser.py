@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+# -*-coding:UTF-8 -*
+
+"""
+PGP Parser
+==========
+
+Minimal in-process OpenPGP (RFC 4880) packet parser.
+
+Only the packets needed by the PgpDump module are decoded, the same fields as the pgpdump tool output: user IDs,
+secret keys, key IDs of the signatures issuers (embedded signatures included), of the one-pass signatures and of the
+public-key encrypted session keys recipients. Compressed packets are decompressed and parsed, all the others packets
+are skipped.
+
+"""
+
+import base64
+import binascii
+import bz2
+import re
+import zlib
+
+# Packet Tags
+TAG_PKESK = 1
+TAG_SIGNATURE = 2
+TAG_ONE_PASS_SIGNATURE = 4
+TAG_SECRET_KEY = 5
+TAG_COMPRESSED_DATA = 8
+TAG_USER_ID = 13
+
+# Signature Subpackets
+SUBPACKET_ISSUER = 16
+SUBPACKET_EMBEDDED_SIGNATURE = 32
+
+# Maximum depth of the nested compressed packets
+MAX_DEPTH = 8
+# Maximum size of a decompressed packet (decompression bomb)
+MAX_DECOMPRESSED_SIZE = 10 * 1024 * 1024
+
+ARMOR_HEADER_REGEX = re.compile(r'^[\w-]+: ')
+ARMOR_CHECKSUM_REGEX = re.compile(r'^=[A-Za-z0-9+/]{4}$')
+
+
+class PgpParserError(Exception):
+    pass
+
+
+def format_key_id(key_id):
+    return f'0x{key_id.hex().upper()}'
+
+# # # # # # # # # # # #
+#                     #
+#        ARMOR        #
+#                     #
+# # # # # # # # # # # #
+
+def dearmor(pgp_block):
+    """
+    Decode an ASCII armored PGP block
+
+    :return: bytes
+    """
+    lines = [line.strip() for line in pgp_block.strip().splitlines()]
+    if lines and lines[0].startswith('-----BEGIN '):
+        lines = lines[1:]
+    if lines and lines[-1].startswith('-----END '):
+        lines = lines[:-1]
+    data = []
+    headers = True
+    for line in lines:
+        if not line:
+            headers = False
+            continue
+        if headers and ARMOR_HEADER_REGEX.match(line):
+            continue
+        headers = False
+        # CRC24 checksum
+        if ARMOR_CHECKSUM_REGEX.match(line):
+            break
+        data.append(line)
+    data = re.sub(r'[^A-Za-z0-9+/]', '', ''.join(data))
+    # ignore truncated blocks and base64 padding
+    data = data[:len(data) - len(data) % 4]
+    try:
+        return base64.b64decode(data)
+    except binascii.Error:
+        return b''
+
+# # # # # # # # # # # #
+#                     #
+#       PACKETS       #
+#                     #
+# # # # # # # # # # # #
+
+def _read_new_length(data, offset):
+    """
+    :return: body length, offset, is a partial body length
+    """
+    first = data[offset]
+    if first < 192:
+        return first, offset + 1, False
+    elif first < 224:
+        if offset + 2 > len(data):
+            raise PgpParserError('Truncated packet length')
+        return ((first - 192) << 8) + data[offset + 1] + 192, offset + 2, False
+    elif first == 255:
+        if offset + 5 > len(data):
+            raise PgpParserError('Truncated packet length')
+        return int.from_bytes(data[offset + 1:offset + 5], 'big'), offset + 5, False
+    else:
+        return 1 << (first & 0x1F), offset + 1, True
+
+def iter_packets(data):
+    """
+    Iterate over the packets of a binary OpenPGP message, stop on the first malformed packet
+
+    :return: generator of (tag, body)
+    """
+    offset = 0
+    while offset < len(data):
+        ctb = data[offset]
+        if not ctb & 0x80:
+            return
+        offset += 1
+        try:
+            # new format
+            if ctb & 0x40:
+                tag = ctb & 0x3F
+                if offset >= len(data):
+                    return
+                length, offset, partial = _read_new_length(data, offset)
+                body = data[offset:offset + length]
+                offset += length
+                while partial:
+                    if offset >= len(data):
+                        break
+                    length, offset, partial = _read_new_length(data, offset)
+                    body += data[offset:offset + length]
+                    offset += length
+            # old format
+            else:
+                tag = (ctb >> 2) & 0x0F
+                length_type = ctb & 0x03
+                if length_type == 3:  # indeterminate length
+                    length = len(data) - offset
+                else:
+                    nb_bytes = 1 << length_type
+                    if offset + nb_bytes > len(data):
+                        return
+                    length = int.from_bytes(data[offset:offset + nb_bytes], 'big')
+                    offset += nb_bytes
+                body = data[offset:offset + length]
+                offset += length
+        except PgpParserError:
+            return
+        yield tag, body
+
+def _iter_subpackets(data):
+    offset = 0
+    while offset < len(data):
+        first = data[offset]
+        if first < 192:
+            length = first
+            offset += 1
+        elif first < 255:
+            if offset + 2 > len(data):
+                return
+            length = ((first - 192) << 8) + data[offset + 1] + 192
+            offset += 2
+        else:
+            if offset + 5 > len(data):
+                return
+            length = int.from_bytes(data[offset + 1:offset + 5], 'big')
+            offset += 5
+        if length == 0 or offset + length > len(data):
+            return
+        # remove critical bit
+        yield data[offset] & 0x7F, data[offset + 1:offset + length]
+        offset += length
+
+def get_signature_issuers(body, depth=0):
+    """
+    :return: list of the issuers key IDs bytes of a signature packet (embedded signatures included)
+    """
+    issuers = []
+    if not body:
+        return issuers
+    version = body[0]
+    if version in (2, 3):
+        if len(body) >= 15:
+            issuers.append(body[7:15])
+    elif version == 4:
+        offset = 4
+        # hashed then unhashed subpackets
+        for _ in range(2):
+            if offset + 2 > len(body):
+                break
+            length = int.from_bytes(body[offset:offset + 2], 'big')
+            offset += 2
+            for subpacket_type, subpacket in _iter_subpackets(body[offset:offset + length]):
+                if subpacket_type == SUBPACKET_ISSUER and len(subpacket) == 8:
+                    issuers.append(subpacket)
+                elif subpacket_type == SUBPACKET_EMBEDDED_SIGNATURE and depth < MAX_DEPTH:
+                    issuers.extend(get_signature_issuers(subpacket, depth=depth + 1))
+            offset += length
+    return issuers
+
+def _decompress(body):
+    if not body:
+        return b''
+    algo = body[0]
+    try:
+        # ZIP
+        if algo == 1:
+            return zlib.decompressobj(-15).decompress(body[1:], MAX_DECOMPRESSED_SIZE)
+        # ZLIB
+        elif algo == 2:
+            return zlib.decompressobj().decompress(body[1:], MAX_DECOMPRESSED_SIZE)
+        # BZip2
+        elif algo == 3:
+            return bz2.BZ2Decompressor().decompress(body[1:], max_length=MAX_DECOMPRESSED_SIZE)
+        # Uncompressed
+        elif algo == 0:
+            return body[1:]
+    except (zlib.error, OSError, EOFError):
+        pass
+    return b''
+
+def _parse_packets(data, result, depth=0):
+    for tag, body in iter_packets(data):
+        if tag == TAG_USER_ID:
+            result['users'].append(body.decode('utf-8', errors='replace'))
+        elif tag == TAG_SECRET_KEY:
+            result['private'] = True
+        elif tag == TAG_SIGNATURE:
+            for key_id in get_signature_issuers(body):
+                result['keys'].append(format_key_id(key_id))
+        elif tag == TAG_ONE_PASS_SIGNATURE:
+            if len(body) >= 12 and body[0] == 3:
+                result['keys'].append(format_key_id(body[4:12]))
+        elif tag == TAG_PKESK:
+            if len(body) >= 9 and body[0] == 3:
+                result['keys'].append(format_key_id(body[1:9]))
+        elif tag == TAG_COMPRESSED_DATA:
+            if depth < MAX_DEPTH:
+                _parse_packets(_decompress(body), result, depth=depth + 1)
+
+def parse(pgp_block):
+    """
+    Parse an ASCII armored PGP block
+
+    :return: dict: private: bool, contains a secret key packet
+                   users: list of user IDs
+                   keys: list of key IDs: 0x<16 hex digits>, 0x0000000000000000 for an anonymous recipient
+    """
+    result = {'private': False, 'users': [], 'keys': []}
+    _parse_packets(dearmor(pgp_block), result)
+    return result
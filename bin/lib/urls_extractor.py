@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+# -*-coding:UTF-8 -*
+
+"""
+URLs Extractor
+==============
+
+Extract the URLs, hosts, onions and emails of an object in a single pass.
+
+The result is cached in Redis_Cache by object global id: the first module processing the object runs the
+extraction, the others modules (Urls, Onion, Hosts, Mail, Credential) read the parsed structures.
+
+"""
+import json
+import logging.config
+import os
+import re
+import sys
+import time
+
+from multiprocessing import Process as Proc
+
+import DomainClassifier.domainclassifier
+from pyfaup.faup import Faup
+
+sys.path.append(os.environ['AIL_BIN'])
+##################################
+# Import Project packages
+##################################
+from lib import ail_logger
+from lib.ConfigLoader import ConfigLoader
+
+logging.config.dictConfig(ail_logger.get_config())
+logger = logging.getLogger()
+
+config_loader = ConfigLoader()
+r_cache = config_loader.get_redis_conn("Redis_Cache")
+PROTOCOLS_FILE = os.path.join(os.environ['AIL_HOME'], config_loader.get_config_str("Directories", "protocolsfile"))
+REDIS_CACHE_HOST = config_loader.get_config_str('Redis_Cache', 'host')
+REDIS_CACHE_PORT = config_loader.get_config_int('Redis_Cache', 'port')
+REDIS_CACHE_DB = config_loader.get_config_int('Redis_Cache', 'db')
+config_loader = None
+
+# Time to live of the extracted URLs, the time needed by the downstream modules to process the object
+EXTRACTED_TTL = 3600
+MAX_EXECUTION_TIME = 30
+
+EMAIL_REGEX = re.compile(r"[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,6}")
+ONION_REGEX = re.compile(r"((http|https|ftp)?(?:\://)?([a-zA-Z0-9\.\-]+(\:[a-zA-Z0-9\.&%\$\-]+)*@)*((25[0-5]|2[0-4][0-9]|[0-1]{1}[0-9]{2}|[1-9]{1}[0-9]{1}|[1-9])\.(25[0-5]|2[0-4][0-9]|[0-1]{1}[0-9]{2}|[1-9]{1}[0-9]{1}|[1-9]|0)\.(25[0-5]|2[0-4][0-9]|[0-1]{1}[0-9]{2}|[1-9]{1}[0-9]{1}|[1-9]|0)\.(25[0-5]|2[0-4][0-9]|[0-1]{1}[0-9]{2}|[1-9]{1}[0-9]{1}|[0-9])|localhost|([a-zA-Z0-9\-]+\.)*[a-zA-Z0-9\-]+\.onion)(\:[0-9]+)*(/($|[a-zA-Z0-9\.\,\?\'\\\+&%\$#\=~_\-]+))*)")
+# DomainClassifier potential domain regex
+HOST_REGEX = re.compile(r'\b([a-zA-Z\d-]{,63}(\.[a-zA-Z\d-]{,63})+)\b')
+
+def _get_url_regex():
+    # Get all uri from protocolsfile
+    with open(PROTOCOLS_FILE, 'r') as f:
+        uri_scheme = '|'.join(scheme.strip() for scheme in f if scheme.strip())
+    return re.compile("((?i:"+uri_scheme + \
+        ")\://(?:[a-zA-Z0-9\.\-]+(?:\:[a-zA-Z0-9\.&%\$\-]+)*@)*(?:(?:25[0-5]|2[0-4][0-9]|[0-1]{1}[0-9]{2}|[1-9]{1}[0-9]{1}|[1-9])\.(?:25[0-5]|2[0-4][0-9]|[0-1]{1}[0-9]{2}|[1-9]{1}[0-9]{1}|[1-9]|0)\.(?:25[0-5]|2[0-4][0-9]|[0-1]{1}[0-9]{2}|[1-9]{1}[0-9]{1}|[1-9]|0)\.(?:25[0-5]|2[0-4][0-9]|[0-1]{1}[0-9]{2}|[1-9]{1}[0-9]{1}|[0-9])|localhost|(?:[a-zA-Z0-9\-]+\.)*[a-zA-Z0-9\-]+\.(?:[a-zA-Z]{2,15}))(?:\:[0-9]+)*(?:/?(?:[a-zA-Z0-9\.\,\?'\\+&%\$#\=~_\-]+))*)")
+
+URL_REGEX = _get_url_regex()
+
+faup = Faup()
+dom_classifier = None
+valid_tlds = None
+
+def _get_dom_classifier():
+    global dom_classifier
+    if dom_classifier is None:
+        # No regex timeout, the extraction is already running in a subprocess
+        dom_classifier = DomainClassifier.domainclassifier.Extract(rawtext='',
+                                                                   redis_host=REDIS_CACHE_HOST,
+                                                                   redis_port=REDIS_CACHE_PORT,
+                                                                   redis_db=REDIS_CACHE_DB)
+    return dom_classifier
+
+def get_valid_tlds():
+    """
+    :return: set of the IANA TLDs (lowercase)
+    """
+    global valid_tlds
+    if valid_tlds is None:
+        valid_tlds = set(_get_dom_classifier().listtld)
+        valid_tlds.discard('')
+    return valid_tlds
+
+def _faup_str(value):
+    # # TODO: # FIXME: remove me, check faup version
+    try:
+        return value.decode()
+    except AttributeError:
+        return value
+
+def unpack_url(url):
+    faup.decode(url)
+    url_decoded = faup.get()
+    return {'url': _faup_str(url_decoded['url']),
+            'scheme': _faup_str(url_decoded['scheme']),
+            'host': _faup_str(url_decoded['host']),
+            'domain': _faup_str(url_decoded['domain']),
+            'tld': _faup_str(url_decoded['tld'])}
+
+def _extract(content):
+    extracted = {'urls': [], 'hosts': [], 'onions': [], 'emails': []}
+
+    for match in URL_REGEX.finditer(content):
+        url = unpack_url(match.group())
+        url['start'] = match.start()
+        url['end'] = match.end()
+        extracted['urls'].append(url)
+
+    for match in EMAIL_REGEX.finditer(content):
+        email = match.group()
+        extracted['emails'].append({'start': match.start(), 'end': match.end(), 'email': email,
+                                    'domain': email.rsplit('@', 1)[1].lower()})
+
+    candidates = []
+    for match in HOST_REGEX.finditer(content):
+        if match.group(1):
+            candidates.append((match.start(1), match.end(1), match.group(1)))
+    # Check the TLDs of the unique candidates only
+    unique_candidates = {candidate[2] for candidate in candidates}
+    if unique_candidates:
+        classifier = _get_dom_classifier()
+        classifier.text('\n'.join(unique_candidates))
+        valid_hosts = set(classifier.domain)
+    else:
+        valid_hosts = set()
+    for start, end, host in candidates:
+        if host in valid_hosts:
+            extracted['hosts'].append({'start': start, 'end': end, 'host': host, 'tld': host.rsplit('.', 1)[-1]})
+
+    for match in ONION_REGEX.finditer(content):
+        url = match.group()
+        # IPs and localhost
+        if '.onion' not in url.lower():
+            continue
+        host = unpack_url(url)['host']
+        # .onion is not an IANA TLD
+        if host and host.lower().endswith('.onion'):
+            extracted['onions'].append({'start': match.start(), 'end': match.end(), 'url': url,
+                                        'host': host.lower()})
+    return extracted
+
+def _extract_to_cache(r_key, content):
+    r_cache.set(r_key, json.dumps(_extract(content)), ex=EXTRACTED_TTL)
+
+def _run_extraction(r_key, obj_gid, content):
+    proc = Proc(target=_extract_to_cache, args=(r_key, content))
+    try:
+        proc.start()
+        proc.join(MAX_EXECUTION_TIME)
+        if proc.is_alive():
+            proc.terminate()
+            logger.info(f'urls_extractor: processing timeout: {obj_gid}')
+            # Don't run the extraction again for the others modules
+            extracted = {'urls': [], 'hosts': [], 'onions': [], 'emails': []}
+            r_cache.set(r_key, json.dumps(extracted), ex=EXTRACTED_TTL)
+            return extracted
+        else:
+            proc.terminate()
+            extracted = r_cache.get(r_key)
+            if extracted:
+                return json.loads(extracted)
+            return {'urls': [], 'hosts': [], 'onions': [], 'emails': []}
+    except KeyboardInterrupt:
+        print("Caught KeyboardInterrupt, terminating urls extractor worker")
+        proc.terminate()
+        sys.exit(0)
+
+def get_extracted(obj, content=None):
+    """
+    Get the URLs, hosts, onions and emails extracted from an object
+
+    :return: dict of lists: urls: {start, end, url, scheme, host, domain, tld}, hosts: {start, end, host, tld},
+                            onions: {start, end, url, host}, emails: {start, end, email, domain}
+    """
+    obj_gid = obj.get_global_id()
+    r_key = f'extracted:urls:{obj_gid}'
+    extracted = r_cache.get(r_key)
+    if extracted:
+        return json.loads(extracted)
+
+    # Another module is running the extraction
+    while not r_cache.set(f'{r_key}:lock', 1, nx=True, ex=MAX_EXECUTION_TIME + 10):
+        time.sleep(0.1)
+        extracted = r_cache.get(r_key)
+        if extracted:
+            return json.loads(extracted)
+
+    try:
+        extracted = r_cache.get(r_key)
+        if extracted:
+            return json.loads(extracted)
+        if content is None:
+            content = obj.get_content()
+        # DomainClassifier TLDs list is loaded before forking
+        _get_dom_classifier()
+        return _run_extraction(r_key, obj_gid, content)
+    finally:
+        r_cache.delete(f'{r_key}:lock')
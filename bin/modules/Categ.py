@@ -35,9 +35,10 @@ Requirements
 ##################################
 import argparse
 import os
-import re
 import sys
 
+import ahocorasick
+
 sys.path.append(os.environ['AIL_BIN'])
 ##################################
 # Import Project packages
@@ -69,32 +70,66 @@ class Categ(AbstractModule):
 
     # # TODO: trigger reload on change ( save last reload time, ...)
     def reload_categ_words(self):
-        categories = ['CreditCards', 'Mail', 'Onion', 'Urls', 'Credential', 'Cve', 'ApiKey']
-        tmp_dict = {}
-        for filename in categories:
-            bname = os.path.basename(filename)
-            tmp_dict[bname] = []
-            with open(os.path.join(self.categ_files_dir, filename), 'r') as f:
-                patterns = [r'%s' % ( re.escape(s.strip()) ) for s in f]
-                tmp_dict[bname] = re.compile('|'.join(patterns), re.IGNORECASE)
-        self.categ_words = tmp_dict.items()
+        """
+        Load all the categories words in one case-folded Aho-Corasick automaton
+        """
+        self.categories = ['CreditCards', 'Mail', 'Onion', 'Urls', 'Credential', 'Cve', 'ApiKey']
+        words = {}
+        for categ in self.categories:
+            with open(os.path.join(self.categ_files_dir, categ), 'r') as f:
+                for word_index, word in enumerate(f):
+                    word = word.strip().lower()
+                    if word:
+                        if word not in words:
+                            words[word] = []
+                        words[word].append((categ, word_index))
+        self.categ_automaton = ahocorasick.Automaton()
+        for word in words:
+            self.categ_automaton.add_word(word, (len(word), words[word]))
+        self.categ_automaton.make_automaton()
+
+    def search_categ_words(self, content):
+        """
+        Search all the categories words in one pass
+
+        :return: dict, categ: set of matched strings
+        """
+        matches = {categ: [] for categ in self.categories}
+        # Offsets of the lowered content must match the content
+        lowered = content.lower()
+        if len(lowered) != len(content):
+            lowered = ''.join(c if len(c.lower()) != 1 else c.lower() for c in content)
+        for end, (length, categs) in self.categ_automaton.iter(lowered):
+            for categ, word_index in categs:
+                matches[categ].append((end - length + 1, word_index, length))
+
+        # Same matches as a findall of the words alternation: leftmost, first word of the file, non-overlapping
+        found = {}
+        for categ in matches:
+            found[categ] = set()
+            cursor = 0
+            for start, _, length in sorted(matches[categ]):
+                if start >= cursor:
+                    found[categ].add(content[start:start + length])
+                    cursor = start + length
+        return found
 
     def compute(self, message, r_result=False):
         # Get obj Object
         obj = self.get_obj()
-        # Get obj content
-        content = obj.get_content()
         categ_found = []
 
-        # Search for pattern categories in obj content
-        for categ, pattern in self.categ_words:
-
-            if obj.type == 'message' or obj.type == 'ocr' or obj.type == 'qrcode':
+        if obj.type == 'message' or obj.type == 'ocr' or obj.type == 'qrcode':
+            for categ in self.categories:
                 self.add_message_to_queue(message='0', queue=categ)
-            else:
-
-                found = set(re.findall(pattern, content))
-                lenfound = len(found)
+        else:
+            # Get obj content
+            content = obj.get_content()
+
+            # Search for pattern categories in obj content
+            found = self.search_categ_words(content)
+            for categ in self.categories:
+                lenfound = len(found[categ])
                 if lenfound >= self.matchingThreshold:
                     categ_found.append(categ)
                     msg = str(lenfound)
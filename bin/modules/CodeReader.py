@@ -1,14 +1,15 @@
 #!/usr/bin/env python3
 # -*-coding:UTF-8 -*
 """
-The OcrExtractor Module
-======================
+The CodeReader Module
+=====================
 
 """
 
 ##################################
 # Import External packages
 ##################################
+import json
 import os
 import sys
 
@@ -22,8 +23,14 @@ sys.path.append(os.environ['AIL_BIN'])
 ##################################
 from modules.abstract_module import AbstractModule
 from lib.ConfigLoader import ConfigLoader
+from lib import image_derivatives
 from lib.objects import BarCodes
+from lib.objects import Images
 from lib.objects import QrCodes
+from lib.objects import Screenshots
+
+# Time to live of the extracted codes, by image hash
+CACHE_TTL = 86400
 
 
 class CodeReader(AbstractModule):
@@ -42,14 +49,56 @@ class CodeReader(AbstractModule):
 
         self.barcode_type = {'CODABAR', 'CODE39', 'CODE93', 'CODE128', 'EAN8', 'EAN13', 'I25'}  # 2 - 5
 
+        self.qr_detector = cv2.QRCodeDetector()
+        # Neural detector, loaded on the first image needing it
+        self.qreader = None
+
         # Send module state to logs
         self.logger.info(f'Module {self.module_name} initialized')
 
-    def is_cached(self):
-        return self.r_cache.exists(f'qrcode:no:{self.obj.type}:{self.obj.id}')
-
-    def add_to_cache(self):
-        self.r_cache.setex(f'qrcode:no:{self.obj.type}:{self.obj.id}', 86400, 0)
+    def get_cached_codes(self, image_hash):
+        """
+        :return: (barcodes, qrcodes), None if the image wasn't processed
+        """
+        codes = self.r_cache.get(f'codes:{image_hash}')
+        if codes is not None:
+            return json.loads(codes)
+
+    def add_to_cache(self, image_hash, barcodes, qrcodes):
+        self.r_cache.setex(f'codes:{image_hash}', CACHE_TTL, json.dumps([barcodes, qrcodes]))
+
+    def get_qreader(self):
+        if self.qreader is None:
+            self.qreader = QReader()
+        return self.qreader
+
+    def get_near_duplicate_codes(self):
+        """
+        Reuse the codes extracted from an identical image or screenshot (recompressed, resized)
+
+        :return: (barcodes, qrcodes), None if no near-duplicate was processed
+        """
+        for obj_gid, distance, width, height in self.obj.get_near_duplicates(obj_types={'image', 'screenshot'}):
+            obj_type, _, obj_id = obj_gid.split(':', 2)
+            if obj_type == 'image':
+                obj = Images.Image(obj_id)
+            else:
+                obj = Screenshots.Screenshot(obj_id)
+            # Same layout, different codes
+            if not image_derivatives.is_same_image(self.obj.get_filepath(), obj.get_filepath()):
+                continue
+            codes = self.get_cached_codes(obj_id)
+            if codes is not None:
+                return codes
+            qrcodes = []
+            for c_id in obj.get_correlation('qrcode').get('qrcode', []):
+                qrcodes.append(QrCodes.Qrcode(c_id.split(':', 1)[1]).get_content())
+            barcodes = []
+            for c_id in obj.get_correlation('barcode').get('barcode', []):
+                barcodes.append(BarCodes.Barcode(c_id.split(':', 1)[1]).get_content())
+            if qrcodes or barcodes:
+                return barcodes, qrcodes
+        return None
 
     def extract_codes(self, path):
         barcodes = []
@@ -79,56 +128,75 @@ class CodeReader(AbstractModule):
         except ValueError as e:
             self.logger.error(f'{e}: {self.obj.get_global_id()}')
 
+        if qrcodes:
+            return barcodes, qrcodes
+
+        # QR codes detectors, from the cheapest to the most expensive
+        try:
+            qr, decodeds, qarray, _ = self.qr_detector.detectAndDecodeMulti(image)
+            if qr:
+                qr_codes = True
+                for d in decodeds:
+                    if d:
+                        qrcodes.append(d)
+        except cv2.error as e:
+            self.logger.error(f'{e}: {self.obj.get_global_id()}')
         if not qrcodes:
-            detector = cv2.QRCodeDetector()
             try:
-                qr, decodeds, qarray, _ = detector.detectAndDecodeMulti(image)
-                if qr:
-                    qr_codes = True
-                    for d in decodeds:
-                        if d:
-                            qrcodes.append(d)
-            except cv2.error as e:
-                self.logger.error(f'{e}: {self.obj.get_global_id()}')
-            try:
-                data_qr, box, qrcode_image = detector.detectAndDecode(image)
+                data_qr, box, qrcode_image = self.qr_detector.detectAndDecode(image)
                 if data_qr:
                     qrcodes.append(data_qr)
                     qr_codes = True
             except cv2.error as e:
                 self.logger.error(f'{e}: {self.obj.get_global_id()}')
 
+        if qr_codes and not qrcodes:
+            # binarized image: low contrast or noisy QR codes
+            gray = cv2.cvtColor(image, cv2.COLOR_RGB2GRAY)
+            _, binary = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+            try:
+                for decoded in decode(binary):
+                    if decoded.type == 'QRCODE' and decoded.data:
+                        qrcodes.append(decoded.data.decode())
+            except ValueError as e:
+                self.logger.error(f'{e}: {self.obj.get_global_id()}')
+
         if qr_codes and not qrcodes:
             # # # # 0.5s per image
             try:
-                qreader = QReader()
-                decoded_text = qreader.detect_and_decode(image=image)
+                decoded_text = self.get_qreader().detect_and_decode(image=image)
                 for d in decoded_text:
-                    qrcodes.append(d)
-                    qr_codes = True
+                    if d:
+                        qrcodes.append(d)
             except ValueError as e:
                 self.logger.error(f'{e}: {self.obj.get_global_id()}')
-            if not qr_codes:
-                self.logger.warning(f'Can notextract qr code: {self.obj.get_global_id()}')
+            if not qrcodes:
+                self.logger.warning(f'Can not extract qr code: {self.obj.get_global_id()}')
 
         return barcodes, qrcodes
 
     def compute(self, message):
         obj = self.get_obj()
 
-        if self.is_cached():
-            return None
-
         if obj.type == 'image':
             if self.obj.is_gif():
                 self.logger.warning(f'Ignoring GIF: {self.obj.id}')
                 return None
 
-        # image - screenshot
-        path = self.obj.get_filepath()
-        barcodes, qrcodes = self.extract_codes(path)
+        # image - screenshot: the objects IDs are the sha256 of the images
+        codes = self.get_cached_codes(obj.id)
+        if codes is None:
+            codes = self.get_near_duplicate_codes()
+            if codes is None:
+                path = self.obj.get_filepath()
+                # flat or blurry image
+                if not image_derivatives.has_details(path):
+                    codes = [], []
+                else:
+                    codes = self.extract_codes(path)
+            self.add_to_cache(obj.id, *codes)
+        barcodes, qrcodes = codes
         if not barcodes and not qrcodes:
-            self.add_to_cache()
             return None
 
         for content in qrcodes:
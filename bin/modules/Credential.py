@@ -29,7 +29,6 @@ Redis organization:
 import os
 import sys
 import time
-from pyfaup.faup import Faup
 
 sys.path.append(os.environ['AIL_BIN'])
 ##################################
@@ -37,6 +36,7 @@ sys.path.append(os.environ['AIL_BIN'])
 ##################################
 from modules.abstract_module import AbstractModule
 from lib import ConfigLoader
+from lib import urls_extractor
 
 
 class Credential(AbstractModule):
@@ -54,14 +54,16 @@ class Credential(AbstractModule):
     REDIS_KEY_ALL_PATH_SET_REV = 'AllPathRev'
     REDIS_KEY_MAP_CRED_TO_PATH = 'CredToPathMapping'
 
+    # Credentials: user:pass, url:user:pass and url|user|pass
+    CRED_URL = r"(?:https?:\/\/)?[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}(?::[0-9]+)?(?:\/[^\s:|]*)?"
+    CRED_USER = r"[a-zA-Z0-9\\._-]+@[a-zA-Z0-9\\.-]+\.[a-zA-Z]{2,6}"
+    CRED_SEP = r"[\\rn :|\_\-]{1,10}"
+    CRED_PASSWORD = r"[a-zA-Z0-9\_\-]+"
+
     def __init__(self):
         super(Credential, self).__init__()
 
-        self.faup = Faup()
-
-        self.regex_web = r"((?:https?:\/\/)[\.-_0-9a-zA-Z]+\.[0-9a-zA-Z]+)"
-        self.regex_cred = r"[a-zA-Z0-9\\._-]+@[a-zA-Z0-9\\.-]+\.[a-zA-Z]{2,6}[\\rn :\_\-]{1,10}[a-zA-Z0-9\_\-]+"
-        self.regex_site_for_stats = r"@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,6}:"
+        self.regex_cred = f"(?:{self.CRED_URL}[:|])?{self.CRED_USER}{self.CRED_SEP}{self.CRED_PASSWORD}"
 
         # Database
         config_loader = ConfigLoader.ConfigLoader()
@@ -85,14 +87,17 @@ class Credential(AbstractModule):
 
         content = obj.get_content()
 
-        # TODO: USE SETS
         # Extract all credentials
-        all_credentials = self.regex_findall(self.regex_cred, obj.get_id(), content)
+        all_credentials = self.regex_finditer(self.regex_cred, obj.get_global_id(), content)
         if all_credentials:
             nb_cred = len(all_credentials)
             message = f'Checked {nb_cred} credentials found.'
 
-            all_sites = self.regex_findall(self.regex_web, obj.get_id(), content, r_set=True)
+            # websites: domain
+            all_sites = {}
+            for url in urls_extractor.get_extracted(obj, content=content)['urls']:
+                if url['scheme'] in ('http', 'https'):
+                    all_sites[f"{url['scheme']}://{url['host']}"] = url['domain']
             if all_sites:
                 discovered_sites = ', '.join(all_sites)
                 message += f' Related websites: {discovered_sites}'
@@ -106,36 +111,6 @@ class Credential(AbstractModule):
                 tag = 'infoleak:automatic-detection="credential"'
                 self.add_message_to_queue(message=tag, queue='Tags')
 
-                site_occurrence = self.regex_findall(self.regex_site_for_stats, obj.get_id(), content)
-
-                creds_sites = {}
-
-                for site in site_occurrence:
-                    site_domain = site[1:-1].lower()
-                    if site_domain in creds_sites.keys():
-                        creds_sites[site_domain] += 1
-                    else:
-                        creds_sites[site_domain] = 1
-
-                for url in all_sites:
-                    self.faup.decode(url)
-                    domain = self.faup.get()['domain']
-                    # # TODO: # FIXME: remove me, check faup versionb
-                    try:
-                        domain = domain.decode()
-                    except:
-                        pass
-                    if domain in creds_sites.keys():
-                        creds_sites[domain] += 1
-                    else:
-                        creds_sites[domain] = 1
-
-                # for site, num in creds_sites.items(): # Send for each different site to moduleStats
-                #
-                #     mssg = f'credential;{num};{site};{item.get_date()}'
-                #     print(mssg)
-                #     self.add_message_to_queue(mssg, 'ModuleStats')
-
                 if all_sites:
                     discovered_sites = ', '.join(all_sites)
                     print(f"=======> Probably on : {discovered_sites}")
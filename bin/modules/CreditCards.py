@@ -23,6 +23,7 @@ sys.path.append(os.environ['AIL_BIN'])
 # Import Project packages
 ##################################
 from modules.abstract_module import AbstractModule
+from lib import numeric_tokens
 from packages import lib_refine
 
 class CreditCards(AbstractModule):
@@ -45,6 +46,8 @@ class CreditCards(AbstractModule):
 
         self.regex = re.compile('|'.join(cards))
         self.re_clean_card = r'[^0-9]'
+        # Shortest card number: Maestro
+        self.min_digits = 12
 
         # Waiting time in seconds between to message processed
         self.pending_seconds = 10
@@ -57,9 +60,20 @@ class CreditCards(AbstractModule):
         if lib_refine.is_luhn_valid(clean_card):
             return clean_card
 
+    def search_cards(self, content):
+        """
+        Search the cards numbers in the digits runs long enough to be a card number
+
+        :return: list of (start, end, value)
+        """
+        runs = numeric_tokens.get_digits_runs(content, self.min_digits)
+        if not runs:
+            return []
+        return numeric_tokens.finditer_spans(self.regex, content, runs)
+
     def extract(self, obj, content, tag):
         extracted = []
-        cards = self.regex_finditer(self.regex, obj.get_global_id(), content)
+        cards = self.search_cards(content)
         for card in cards:
             start, end, value = card
             if self.get_valid_card(value):
@@ -69,7 +83,7 @@ class CreditCards(AbstractModule):
     def compute(self, message, r_result=False):
         obj = self.get_obj()
         content = obj.get_content()
-        all_cards = self.regex_findall(self.regex, obj.id, content)
+        all_cards = [card[2] for card in self.search_cards(content)]
 
         if len(all_cards) > 0:
             # self.logger.debug(f'All matching {all_cards}')
@@ -13,8 +13,12 @@ the out output of the Global module.
 ##################################
 # Import External packages
 ##################################
+import json
 import os
 import sys
+import time
+from collections import OrderedDict
+
 import DomainClassifier.domainclassifier
 
 sys.path.append(os.environ['AIL_BIN'])
@@ -25,6 +29,8 @@ from modules.abstract_module import AbstractModule
 from lib.ConfigLoader import ConfigLoader
 from lib import d4
 
+# Number of domains classifications kept in memory
+LRU_SIZE = 10000
 
 class DomClassifier(AbstractModule):
     """
@@ -35,6 +41,7 @@ class DomClassifier(AbstractModule):
         super(DomClassifier, self).__init__()
 
         config_loader = ConfigLoader()
+        self.r_cache = config_loader.get_redis_conn("Redis_Cache")
 
         # Waiting time in seconds between to message processed
         self.pending_seconds = 1
@@ -52,47 +59,137 @@ class DomClassifier(AbstractModule):
         self.cc = config_loader.get_config_str("DomClassifier", "cc")
         self.cc_tld = config_loader.get_config_str("DomClassifier", "cc_tld")
 
+        # Domains classifications cache: process LRU + Redis_Cache
+        self.lru = OrderedDict()
+        self.cache_ttl = 3600
+        if config_loader.has_option('DomClassifier', 'cache_ttl'):
+            self.cache_ttl = config_loader.get_config_int('DomClassifier', 'cache_ttl')
+        if config_loader.has_option('DomClassifier', 'batch_size'):
+            self.batch_size = config_loader.get_config_int('DomClassifier', 'batch_size')
+
         # Send module state to logs
         self.logger.info(f"Module: {self.module_name} Launched")
 
+    def _get_lru(self, domain):
+        cached = self.lru.get(domain)
+        if cached:
+            expire, classification = cached
+            if expire > time.time():
+                self.lru.move_to_end(domain)
+                return classification
+            del self.lru[domain]
+        return None
+
+    def _add_lru(self, domain, classification, ttl):
+        self.lru[domain] = (time.time() + ttl, classification)
+        self.lru.move_to_end(domain)
+        if len(self.lru) > LRU_SIZE:
+            self.lru.popitem(last=False)
+
+    def classify_domain(self, domain):
+        """
+        :return: dict: vdomain: list of valid domains/passive DNS records,
+                       cc_tld: domains located in cc_tld, cc: domains located in cc
+        """
+        classification = {'vdomain': [], 'cc_tld': [], 'cc': []}
+        self.dom_classifier.text(rawtext=domain)
+        if not self.dom_classifier.domain:
+            return classification
+        print(self.dom_classifier.domain)
+        self.dom_classifier.validdomain(passive_dns=True, extended=False)
+        # self.logger.debug(self.dom_classifier.vdomain)
+        classification['vdomain'] = list(self.dom_classifier.vdomain)
+        if self.cc_tld:
+            classification['cc_tld'] = list(self.dom_classifier.include(expression=self.cc_tld))
+        if self.cc:
+            classification['cc'] = list(self.dom_classifier.localizedomain(cc=self.cc))
+        return classification
+
+    def classify_domains(self, domains):
+        """
+        Classify the unique domains, use the cached classifications
+
+        :return: dict: domain: classification
+        """
+        classifications = {}
+        to_fetch = []
+        for domain in set(domains):
+            classification = self._get_lru(domain)
+            if classification is None:
+                to_fetch.append(domain)
+            else:
+                classifications[domain] = classification
+        if to_fetch:
+            pipe = self.r_cache.pipeline()
+            for domain in to_fetch:
+                pipe.get(f'domclassifier:{domain}')
+                pipe.ttl(f'domclassifier:{domain}')
+            cached = pipe.execute()
+            for i, domain in enumerate(to_fetch):
+                classification, ttl = cached[i * 2], cached[i * 2 + 1]
+                if classification:
+                    classification = json.loads(classification)
+                    if ttl > 0:
+                        self._add_lru(domain, classification, ttl)
+                else:
+                    classification = self.classify_domain(domain)
+                    self.r_cache.setex(f'domclassifier:{domain}', self.cache_ttl, json.dumps(classification))
+                    self._add_lru(domain, classification, self.cache_ttl)
+                classifications[domain] = classification
+        return classifications
+
+    def _process_classification(self, classification):
+        if not classification['vdomain']:
+            return
+        print(classification['vdomain'])
+        print()
+
+        if d4.is_passive_dns_enabled():
+            for dns_record in classification['vdomain']:
+                self.add_message_to_queue(obj=None, message=dns_record)
+
+        if classification['cc_tld']:
+            print(classification['cc_tld'])
+            self.logger.info(f"{set(classification['cc_tld'])} located in {self.cc_tld};{self.obj.get_global_id()}")
+
+        if classification['cc']:
+            print(classification['cc'])
+            self.logger.info(f"{classification['cc']} located in {self.cc};{self.obj.get_global_id()}")
+
     def compute(self, message, r_result=False):
         host = message
 
         try:
-
-            self.dom_classifier.text(rawtext=host)
-            if not self.dom_classifier.domain:
-                return
-            print(self.dom_classifier.domain)
-            self.dom_classifier.validdomain(passive_dns=True, extended=False)
-            # self.logger.debug(self.dom_classifier.vdomain)
-
-            print(self.dom_classifier.vdomain)
-            print()
-
-            if self.dom_classifier.vdomain and d4.is_passive_dns_enabled():
-                for dns_record in self.dom_classifier.vdomain:
-                    self.add_message_to_queue(obj=None, message=dns_record)
-
-            if self.cc_tld:
-                localizeddomains = self.dom_classifier.include(expression=self.cc_tld)
-                if localizeddomains:
-                    print(localizeddomains)
-                    self.logger.info(f"{localizeddomains} located in {self.cc_tld};{self.obj.get_global_id()}")
-
-            if self.cc:
-                localizeddomains = self.dom_classifier.localizedomain(cc=self.cc)
-                if localizeddomains:
-                    print(localizeddomains)
-                    self.logger.info(f"{localizeddomains} located in {self.cc};{self.obj.get_global_id()}")
+            classification = self.classify_domains([host])[host]
+            self._process_classification(classification)
 
             if r_result:
-                return self.dom_classifier.vdomain
+                return classification['vdomain']
 
         except IOError as err:
             self.logger.error(f"{self.obj.get_global_id()};CRC Checksum Failed")
             raise Exception(f"CRC Checksum Failed on: {self.obj.get_global_id()}")
 
+    def compute_batch(self, messages):
+        # Classify the unique hosts of the batch once
+        try:
+            classifications = self.classify_domains([message for _, message in messages])
+        except IOError:
+            # Classify the hosts one by one, the classified hosts are cached
+            classifications = None
+        for obj, host in messages:
+            self.obj = obj
+            try:
+                if classifications is None:
+                    classification = self.classify_domains([host])[host]
+                else:
+                    classification = classifications[host]
+                self._process_classification(classification)
+            except IOError as err:
+                self.logger.error(f"{self.obj.get_global_id()};CRC Checksum Failed")
+            self.set_processed(obj, host)
+        self.obj = None
+
 
 if __name__ == "__main__":
     module = DomClassifier()
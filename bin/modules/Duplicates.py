@@ -10,6 +10,8 @@ Its input comes from other modules, namely:
     Credential
 
 Perform comparisions with ssdeep and tlsh
+TLSH hashs are searched in a monthly pivot index (see lib/Duplicate.py)
+Each item is added to the near-duplicate cluster of its most similar item
 
 """
 
@@ -41,6 +43,9 @@ class Duplicates(AbstractModule):
         self.min_item_size = float(config_loader.get_config_str('Modules_Duplicates', 'min_paste_size')) # # TODO: # FIXME: rename me
         self.maximum_month_range = config_loader.get_config_int('Modules_Duplicates', 'maximum_month_range')
 
+        if config_loader.has_option('Modules_Duplicates', 'batch_size'):
+            self.batch_size = config_loader.get_config_int('Modules_Duplicates', 'batch_size')
+
         self.algos = {
                         "ssdeep": {"threshold": THRESHOLD_SSDEEP},
                         "tlsh": {"threshold": THRESHOLD_TLSH}
@@ -49,12 +54,19 @@ class Duplicates(AbstractModule):
         self.logger.info(f"Module: {self.module_name} Launched")
 
     def compute(self, message):
-        # IOError: "CRC Checksum Failed on : {id}"
+        self.compute_batch([(self.get_obj(), message)])
 
-        item = self.get_obj()
+    def compute_batch(self, messages):
+        # IOError: "CRC Checksum Failed on : {id}"
 
         # Check file size
-        if item.get_size() < self.min_item_size:
+        items = []
+        items_messages = []
+        for item, message in messages:
+            if item and item.get_size() >= self.min_item_size:
+                items.append(item)
+                items_messages.append(message)
+        if not items:
             return None
 
         # one month
@@ -64,37 +76,73 @@ class Duplicates(AbstractModule):
         x = time.time()
 
         # Get Hashs
-        content = item.get_content(r_type='bytes')
-        self.algos['ssdeep']['hash'] = Duplicate.get_ssdeep_hash(content)
-        self.algos['tlsh']['hash'] = Duplicate.get_tlsh_hash(content)
+        hashs = {'ssdeep': [], 'tlsh': []}
+        for item in items:
+            content = item.get_content(r_type='bytes')
+            hashs['ssdeep'].append(Duplicate.get_ssdeep_hash(content))
+            hashs['tlsh'].append(Duplicate.get_tlsh_hash(content))
 
         # TODO: Handle computed duplicates
 
-        nb_duplicates = 0
+        # similar objects by item: obj_id: max similarity
+        similar = [{} for _ in items]
 
         for algo in self.algos:
-            obj_hash = self.algos[algo]['hash']
+            threshold = self.algos[algo]['threshold']
             for date_ymonth in last_month_dates:
-                if Duplicate.exists_algo_hash_by_month(algo, obj_hash, date_ymonth):
-                    Duplicate.add_duplicate(algo, obj_hash, 100, 'item', '', item.get_id(), date_ymonth)
-                    nb_duplicates += 1
-                else:
-                    for hash in Duplicate.get_algo_hashs_by_month(algo, date_ymonth):
+                # ssdeep: fetch and group the hashs of the month once by batch
+                if algo == 'ssdeep':
+                    month_hashs = Duplicate.group_ssdeep_hashs_by_blocksize(Duplicate.get_algo_hashs_by_month(algo, date_ymonth))
+                for i, obj_hash in enumerate(hashs[algo]):
+                    if Duplicate.exists_algo_hash_by_month(algo, obj_hash, date_ymonth):
+                        similarities = [(obj_hash, 100)]
+                    elif algo == 'tlsh':
+                        max_distance = 100 - threshold
+                        similarities = [(hash, 100 - min(distance, 100)) for hash, distance in Duplicate.get_tlsh_neighbours(date_ymonth, obj_hash, max_distance)]
+                    else:
                         # # FIXME:  try - catch 'hash not comparable, bad hash: '+dico_hash+' , current_hash: '+paste_hash
-                        similarity = Duplicate.get_algo_similarity(algo, obj_hash, hash)
-                        print(f'[{algo}] comparing: {obj_hash} and {hash} similarity: {similarity}')  # DEBUG:
-                        if similarity >= self.algos[algo]['threshold']:
-                            Duplicate.add_duplicate(algo, hash, similarity, 'item', '', item.get_id(), date_ymonth)
-                            nb_duplicates += 1
+                        similarities = Duplicate.get_ssdeep_similarities(obj_hash, month_hashs)
+                    for hash, similarity in similarities:
+                        if similarity >= threshold:
+                            obj_id = Duplicate.get_object_id_by_hash(algo, hash, date_ymonth)
+                            if obj_id:
+                                similar[i][obj_id] = max(similarity, similar[i].get(obj_id, 0))
 
             # Save Hashs
-            Duplicate.save_object_hash(algo, curr_date_ymonth, self.algos[algo]['hash'], item.get_id())
+            for item, obj_hash in zip(items, hashs[algo]):
+                Duplicate.save_object_hash(algo, curr_date_ymonth, obj_hash, item.get_id())
+
+            # Compare the items of the batch
+            for i in range(1, len(items)):
+                obj_hash = hashs[algo][i]
+                if algo == 'tlsh':
+                    if not Duplicate.is_valid_tlsh_hash(obj_hash):
+                        continue
+                    others = [j for j in range(i) if Duplicate.is_valid_tlsh_hash(hashs[algo][j])]
+                    distances = Duplicate.get_tlsh_distances(obj_hash, [hashs[algo][j] for j in others])
+                    similarities = [(j, 100 - min(d, 100)) for j, d in zip(others, distances)]
+                else:
+                    similarities = [(j, Duplicate.get_ssdeep_similarity(obj_hash, hashs[algo][j])) for j in range(i)]
+                for j, similarity in similarities:
+                    if similarity >= threshold:
+                        obj_id = items[j].get_id()
+                        similar[i][obj_id] = max(similarity, similar[i].get(obj_id, 0))
+
+        # Near-duplicate clusters
+        nb_duplicates = 0
+        for i, item in enumerate(items):
+            similar[i].pop(item.get_id(), None)
+            if similar[i]:
+                nb_duplicates += 1
+            obj_hashs = {algo: hashs[algo][i] for algo in self.algos}
+            Duplicate.add_obj_to_cluster('item', '', item.get_id(), obj_hashs, similar[i])
+            self.set_processed(item, items_messages[i])
 
         if nb_duplicates:
-            self.logger.info(f'Duplicates {nb_duplicates};{self.obj.get_global_id()}')
+            self.logger.info(f'Duplicates {nb_duplicates};{len(items)} items')
 
         y = time.time()
-        print(f'{self.obj.get_global_id()} Processed in {y-x} sec')
+        print(f'{len(items)} items Processed in {y-x} sec')
         # self.logger.debug('{}Processed in {} sec'.format(to_print, y-x))
 
 
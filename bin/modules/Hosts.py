@@ -15,17 +15,15 @@ It is looking for Hosts
 # Import External packages
 ##################################
 import os
-import re
 import sys
 
-import DomainClassifier.domainclassifier
-
 sys.path.append(os.environ['AIL_BIN'])
 ##################################
 # Import Project packages
 ##################################
 from modules.abstract_module import AbstractModule
 from lib.ConfigLoader import ConfigLoader
+from lib import urls_extractor
 
 class Hosts(AbstractModule):
     """
@@ -38,31 +36,19 @@ class Hosts(AbstractModule):
         config_loader = ConfigLoader()
         self.r_cache = config_loader.get_redis_conn("Redis_Cache")
 
-        # regex timeout
-        self.regex_timeout = 30
-
         # Waiting time in seconds between to message processed
         self.pending_seconds = 1
 
-        redis_host = config_loader.get_config_str('Redis_Cache', 'host')
-        redis_port = config_loader.get_config_int('Redis_Cache', 'port')
-        redis_db = config_loader.get_config_int('Redis_Cache', 'db')
-        self.dom_classifier = DomainClassifier.domainclassifier.Extract(rawtext="",
-                                                                        redis_host=redis_host,
-                                                                        redis_port=redis_port,
-                                                                        redis_db=redis_db,
-                                                                        re_timeout=30)
         self.logger.info(f"Module: {self.module_name} Launched")
 
     def compute(self, message):
         obj = self.get_obj()
 
-        content = obj.get_content()
-        self.dom_classifier.text(content)
-        if self.dom_classifier.domain:
-            print(f'{len(self.dom_classifier.domain)} host     {obj.get_id()}')
-            # print(self.dom_classifier.domain)
-            for domain in self.dom_classifier.domain:
+        # unique hosts
+        domains = list(dict.fromkeys(host['host'] for host in urls_extractor.get_extracted(obj)['hosts']))
+        if domains:
+            print(f'{len(domains)} host     {obj.get_id()}')
+            for domain in domains:
                 if domain:
                     self.add_message_to_queue(message=domain, queue='Host')
 
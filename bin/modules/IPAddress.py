@@ -15,9 +15,11 @@ and should be defined in the config.cfg file, under the [IP] section
 """
 import os
 import re
+import socket
 import sys
 
-from ipaddress import IPv4Network, IPv4Address
+from bisect import bisect_right
+from ipaddress import ip_network
 
 sys.path.append(os.environ['AIL_BIN'])
 ##################################
@@ -27,7 +29,49 @@ from modules.abstract_module import AbstractModule
 from lib.ConfigLoader import ConfigLoader
 from lib import regex_helper
 
-# TODO REWRITE ME -> PERF + IPV6 + Tracker ?
+# TODO Tracker ?
+
+class IPNetworks:
+    """
+    IPv4 and IPv6 networks compiled into sorted and merged integer intervals, searched with bisect
+    """
+
+    def __init__(self, networks):
+        self.intervals = {4: ([], []), 6: ([], [])}
+        ranges = {4: [], 6: []}
+        for network in networks:
+            ranges[network.version].append((int(network.network_address), int(network.broadcast_address)))
+        for version in ranges:
+            starts, ends = self.intervals[version]
+            for start, end in sorted(ranges[version]):
+                # merge overlapping networks
+                if ends and start <= ends[-1] + 1:
+                    ends[-1] = max(ends[-1], end)
+                else:
+                    starts.append(start)
+                    ends.append(end)
+
+    def has_ipv6(self):
+        return bool(self.intervals[6][0])
+
+    def __contains__(self, address):
+        """
+        :param address: (version, int address)
+        """
+        starts, ends = self.intervals[address[0]]
+        i = bisect_right(starts, address[1]) - 1
+        return i >= 0 and address[1] <= ends[i]
+
+def parse_ipv4(ip):
+    a, b, c, d = ip.split('.')
+    return 4, (int(a) << 24) | (int(b) << 16) | (int(c) << 8) | int(d)
+
+def parse_ipv6(ip):
+    try:
+        return 6, int.from_bytes(socket.inet_pton(socket.AF_INET6, ip), 'big')
+    except OSError:
+        return None
+
 
 class IPAddress(AbstractModule):
     """IPAddress module for AIL framework"""
@@ -38,7 +82,7 @@ class IPAddress(AbstractModule):
         config_loader = ConfigLoader()
 
         # Config Load ip_networks
-        self.ip_networks = set()
+        ip_networks = set()
         networks = config_loader.get_config_str("IP", "networks")
         if not networks:
             print('No IP ranges provided')
@@ -46,14 +90,18 @@ class IPAddress(AbstractModule):
         else:
             try:
                 for network in networks.split(","):
-                    self.ip_networks.add(IPv4Network(network))
+                    ip_networks.add(ip_network(network.strip()))
                     print(f'IP Range To Search: {network}')
             except:
                 print('Please provide a list of valid IP addresses')
                 sys.exit(0)
+        self.ip_networks = IPNetworks(ip_networks) if ip_networks else None
 
         self.re_ipv4 = r'(?:(?:25[0-5]|2[0-4][0-9]|[01]?[0-9][0-9]?)\.){3}(?:25[0-5]|2[0-4][0-9]|[01]?[0-9][0-9]?)'
         re.compile(self.re_ipv4)
+        # IPv6 candidates, validated by parse_ipv6, with the dotted-quad tail of the IPv4-mapped addresses
+        self.re_ipv6 = rf'(?<![0-9A-Fa-f:])(?:[0-9A-Fa-f]{{0,4}}:){{2,7}}(?:{self.re_ipv4}|[0-9A-Fa-f]{{0,4}})(?![0-9A-Fa-f:]|\.[0-9])'
+        re.compile(self.re_ipv6)
 
         self.redis_cache_key = regex_helper.generate_redis_cache_key(self.module_name)
         self.max_execution_time = 60
@@ -69,16 +117,19 @@ class IPAddress(AbstractModule):
         content = obj.get_content()
 
         # list of the regex results in the Item
-        results = self.regex_findall(self.re_ipv4, obj.get_id(), content)
-        results = set(results)
+        results = set(self.regex_findall(self.re_ipv4, obj.get_id(), content))
+        addresses = {ip: parse_ipv4(ip) for ip in results}
+        if self.ip_networks.has_ipv6():
+            for ip in set(self.regex_findall(self.re_ipv6, obj.get_id(), content)):
+                address = parse_ipv6(ip)
+                if address:
+                    addresses[ip] = address
+
         matching_ips = []
-        for ip in results:
-            ip = '.'.join([str(int(x)) for x in ip.split('.')])
-            address = IPv4Address(ip)
-            for network in self.ip_networks:
-                if address in network:
-                    self.logger.info(address)
-                    matching_ips.append(address)
+        for ip, address in addresses.items():
+            if address in self.ip_networks:
+                self.logger.info(ip)
+                matching_ips.append(ip)
 
         if len(matching_ips) > 0:
             self.logger.info(f'{self.obj.get_global_id()} contains {len(matching_ips)} IPs')
@@ -87,6 +138,9 @@ class IPAddress(AbstractModule):
             tag = 'infoleak:automatic-detection="ip"'
             self.add_message_to_queue(message=tag, queue='Tags')
 
+        if r_result:
+            return matching_ips
+
 
 if __name__ == "__main__":
     module = IPAddress()
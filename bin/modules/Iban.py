@@ -24,6 +24,7 @@ sys.path.append(os.environ['AIL_BIN'])
 # Import Project packages
 ##################################
 from modules.abstract_module import AbstractModule
+from lib import numeric_tokens
 # from lib.ConfigLoader import ConfigLoader
 # from lib import Statistics
 
@@ -61,9 +62,27 @@ class Iban(AbstractModule):
             return True
         return False
 
+    def search_ibans(self, content):
+        """
+        Match the IBAN regex on the IBAN candidates only
+
+        :return: list of (start, end, value)
+        """
+        ibans = []
+        last_end = 0
+        for start in numeric_tokens.get_iban_starts(content):
+            # non-overlapping matches
+            if start < last_end:
+                continue
+            match = self.iban_regex.match(content, start)
+            if match:
+                ibans.append((match.start(), match.end(), match.group()))
+                last_end = match.end()
+        return ibans
+
     def extract(self, obj, content, tag):
         extracted = []
-        ibans = self.regex_finditer(self.iban_regex, obj.get_global_id(), content)
+        ibans = self.search_ibans(content)
         for iban in ibans:
             start, end, value = iban
             value = ''.join(e for e in value if e.isalnum())
@@ -73,16 +92,13 @@ class Iban(AbstractModule):
 
     def compute(self, message):
         obj = self.get_obj()
-        obj_id = obj.get_id()
 
-        ibans = self.regex_findall(self.iban_regex, obj_id, obj.get_content())
+        ibans = self.search_ibans(obj.get_content())
         if ibans:
             valid_ibans = set()
             for iban in ibans:
-                iban = iban[1:-1].replace("'", "").split(',')
-                iban = iban[0]+iban[1]+iban[2]
-                iban = ''.join(e for e in iban if e.isalnum())
-                if self.regex_findall(self.iban_regex_verify, obj_id, iban):
+                iban = ''.join(e for e in iban[2] if e.isalnum())
+                if self.iban_regex_verify.match(iban):
                     print(f'checking {iban}')
                     if self.is_valid_iban(iban):
                         valid_ibans.add(iban)
@@ -9,9 +9,9 @@ sys.path.append(os.environ['AIL_BIN'])
 # Import Project packages
 ##################################
 from modules.abstract_module import AbstractModule
+from lib.ConfigLoader import ConfigLoader
+from lib.Language import get_languages_detector
 from lib.objects.Domains import Domain
-from lib.objects.Items import Item
-# from lib.ConfigLoader import ConfigLoader
 
 class Languages(AbstractModule):
     """
@@ -21,23 +21,41 @@ class Languages(AbstractModule):
     def __init__(self):
         super(Languages, self).__init__()
 
+        config_loader = ConfigLoader()
+        if config_loader.has_option('Languages', 'batch_size'):
+            self.batch_size = config_loader.get_config_int('Languages', 'batch_size')
+
+        # Crawled items detector, see Item.get_languages()
+        self.detector = get_languages_detector(nb_langs=3, min_proportion=0.2, min_probability=0.8, min_len=600)
+
         # Send module state to logs
         self.logger.info(f'Module {self.module_name} initialized')
 
+    def add_domain_languages(self, item, languages):
+        domain = Domain(item.get_domain())
+        for lang in languages:
+            print(lang)
+            domain.add_language(lang)
+
     def compute(self, message):
         obj = self.get_obj()
-        
+
         if obj.type == 'item':
             if obj.is_crawled():
-                domain = Domain(obj.get_domain())
-                for lang in obj.get_languages(min_probability=0.8, force_gcld3=True):
-                    print(lang)
-                    domain.add_language(lang)
+                self.add_domain_languages(obj, self.detector.detect(obj.get_content(), force_gcld3=True))
         # Detect Chat Message Language
         # elif obj.type == 'message':
         #     lang = obj.detect_language()
         #     print(self.obj.id, lang)
 
+    def compute_batch(self, messages):
+        # Detect the languages of the crawled items of the batch at once
+        items = [(obj, message) for obj, message in messages if obj and obj.type == 'item' and obj.is_crawled()]
+        contents = [item.get_content() for item, _ in items]
+        for (item, message), languages in zip(items, self.detector.detect_batch(contents, force_gcld3=True)):
+            self.add_domain_languages(item, languages)
+            self.set_processed(item, message)
+
 
 if __name__ == '__main__':
     module = Languages()
@@ -12,10 +12,10 @@ It tries to identify SQL Injections with libinjection.
 """
 
 import os
+import re
 import sys
 import pylibinjection
 
-from datetime import datetime
 from pyfaup.faup import Faup
 from urllib.parse import unquote
 
@@ -24,11 +24,14 @@ sys.path.append(os.environ['AIL_BIN'])
 ##################################
 # Import Project packages
 ##################################
-from modules.abstract_module import AbstractModule
+from modules.abstract_sqli_module import AbstractSQLInjectionModule
 
-class LibInjection(AbstractModule):
+class LibInjection(AbstractSQLInjectionModule):
     """docstring for LibInjection module."""
 
+    # Prefilter: skip the URLs paths and query values without SQL metacharacters
+    SQLI_CHARS_REGEX = re.compile(rb"['\"`()*=<>;#|&!%+,\\\s]|--|/\*")
+
     def __init__(self):
         super(LibInjection, self).__init__()
 
@@ -36,9 +39,14 @@ class LibInjection(AbstractModule):
 
         self.logger.info(f"Module: {self.module_name} Launched")
 
-    def compute(self, message):
-        url = message
+    def has_sqli_chars_values(self, query_string):
+        # Check the values only: the '=' and '&' separators are in every query string
+        for param in query_string.split(b'&'):
+            if self.SQLI_CHARS_REGEX.search(param.split(b'=', 1)[-1]):
+                return True
+        return False
 
+    def is_sql_injection(self, url):
         self.faup.decode(url)
         url_parsed = self.faup.get()
         # # TODO: # FIXME: remove me
@@ -56,32 +64,33 @@ class LibInjection(AbstractModule):
         result_path = {'sqli': False}
         result_query = {'sqli': False}
 
-        if resource_path is not None:
+        if resource_path is not None and self.SQLI_CHARS_REGEX.search(resource_path):
             result_path = pylibinjection.detect_sqli(resource_path)
             # print(f'path is sqli : {result_path}')
 
-        if query_string is not None:
+        if query_string is not None and self.has_sqli_chars_values(query_string):
             result_query = pylibinjection.detect_sqli(query_string)
             # print(f'query is sqli : {result_query}')
 
-        if result_path['sqli'] is True or result_query['sqli'] is True:
-
-            self.logger.info(f'Detected SQL in URL;{self.obj.get_global_id()}')
-            print(unquote(url))
-
-            # Add tag
-            tag = 'infoleak:automatic-detection="sql-injection"'
-            self.add_message_to_queue(message=tag, queue='Tags')
-
-            # statistics
-            # # # TODO: # FIXME: remove me
-            # try:
-            #     tld = url_parsed['tld'].decode()
-            # except:
-            #     tld = url_parsed['tld']
-            # if tld is not None:
-            #     date = datetime.now().strftime("%Y%m")
-            #     Statistics.add_module_tld_stats_by_date(self.module_name, date, tld, 1)
+        return result_path['sqli'] is True or result_query['sqli'] is True
+
+    def detected(self, url):
+        self.logger.info(f'Detected SQL in URL;{self.obj.get_global_id()}')
+        print(unquote(url))
+
+        # Add tag
+        tag = 'infoleak:automatic-detection="sql-injection"'
+        self.add_message_to_queue(message=tag, queue='Tags')
+
+        # statistics
+        # # # TODO: # FIXME: remove me
+        # try:
+        #     tld = url_parsed['tld'].decode()
+        # except:
+        #     tld = url_parsed['tld']
+        # if tld is not None:
+        #     date = datetime.now().strftime("%Y%m")
+        #     Statistics.add_module_tld_stats_by_date(self.module_name, date, tld, 1)
 
 
 if __name__ == "__main__":
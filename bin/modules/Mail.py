@@ -11,13 +11,14 @@ It apply mail regexes on item content and warn if above a threshold.
 
 """
 
+import asyncio
 import os
-import re
 import sys
 import datetime
 
-import dns.resolver
+import dns.asyncresolver
 import dns.exception
+import dns.resolver
 
 # from pyfaup.faup import Faup
 
@@ -27,6 +28,7 @@ sys.path.append(os.environ['AIL_BIN'])
 ##################################
 from modules.abstract_module import AbstractModule
 from lib.ConfigLoader import ConfigLoader
+from lib import urls_extractor
 # from lib import Statistics
 
 
@@ -48,9 +50,11 @@ class Mail(AbstractModule):
         # Numbers of Mails needed to Tags
         self.mail_threshold = 10
 
-        self.regex_timeout = 30
-        self.email_regex = r"[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,6}"
-        re.compile(self.email_regex)
+        # Max number of concurrent DNS queries
+        self.dns_max_concurrency = 50
+        # Cache NXDOMAIN and no MX record answers, and timeouts for a shorter time
+        self.invalid_mxdomain_ttl = datetime.timedelta(days=1)
+        self.timeout_mxdomain_ttl = datetime.timedelta(hours=1)
 
     def is_mxdomain_in_cache(self, mxdomain):
         return self.r_cache.exists(f'mxdomain:{mxdomain}')
@@ -58,6 +62,48 @@ class Mail(AbstractModule):
     def save_mxdomain_in_cache(self, mxdomain):
         self.r_cache.setex(f'mxdomain:{mxdomain}', datetime.timedelta(days=1), 1)
 
+    def save_invalid_mxdomain_in_cache(self, mxdomain, ttl):
+        self.r_cache.setex(f'mxdomain:invalid:{mxdomain}', ttl, 1)
+
+    async def _resolve_mx_record(self, resolver, semaphore, mxdomain):
+        """
+        :return: (mxdomain, True) if valid, (mxdomain, ttl) to cache an invalid domain or (mxdomain, None)
+        """
+        async with semaphore:
+            try:
+                answers = await resolver.resolve(mxdomain, rdtype=dns.rdatatype.MX)
+                if answers:
+                    return mxdomain, True
+            except dns.resolver.NoNameservers:
+                self.logger.debug('NoNameserver, No non-broken nameservers are available to answer the query.')
+                print('NoNameserver, No non-broken nameservers are available to answer the query.')
+            except dns.resolver.NoAnswer:
+                self.logger.debug('NoAnswer, The response did not contain an answer to the question.')
+                return mxdomain, self.invalid_mxdomain_ttl
+            except dns.name.EmptyLabel:
+                self.logger.debug('SyntaxError: EmptyLabel')
+                return mxdomain, self.invalid_mxdomain_ttl
+            except dns.resolver.NXDOMAIN:
+                self.logger.debug('The query name does not exist.')
+                return mxdomain, self.invalid_mxdomain_ttl
+            except dns.name.LabelTooLong:
+                self.logger.debug('The Label is too long')
+                return mxdomain, self.invalid_mxdomain_ttl
+            except dns.exception.Timeout:
+                self.logger.debug('dns timeout')
+                return mxdomain, self.timeout_mxdomain_ttl
+            except Exception as e:
+                print(e)
+        return mxdomain, None
+
+    async def _resolve_mx_records(self, mxdomains):
+        resolver = dns.asyncresolver.Resolver()
+        resolver.nameservers = [self.dns_server]
+        resolver.timeout = 5.0
+        resolver.lifetime = 2.0
+        semaphore = asyncio.Semaphore(self.dns_max_concurrency)
+        return await asyncio.gather(*[self._resolve_mx_record(resolver, semaphore, mxdomain) for mxdomain in mxdomains])
+
     def check_mx_record(self, set_mxdomains):
         """Check if emails MX domains are responding.
 
@@ -65,68 +111,42 @@ class Mail(AbstractModule):
         :return: (int) Number of address with a responding and valid MX domains
 
         """
-        resolver = dns.resolver.Resolver()
-        resolver.nameservers = [self.dns_server]
-        resolver.timeout = 5.0
-        resolver.lifetime = 2.0
+        valid_tlds = urls_extractor.get_valid_tlds()
+        mxdomains = [mxdomain for mxdomain in set_mxdomains if mxdomain.rsplit('.', 1)[-1] in valid_tlds]
 
-        valid_mxdomain = []
-        for mxdomain in set_mxdomains:
+        # check if is in cache
+        pipe = self.r_cache.pipeline()
+        for mxdomain in mxdomains:
+            pipe.exists(f'mxdomain:{mxdomain}')
+            pipe.exists(f'mxdomain:invalid:{mxdomain}')
+        in_cache = pipe.execute()
 
-            # check if is in cache
-            # # TODO:
-            if self.is_mxdomain_in_cache(mxdomain):
+        valid_mxdomain = []
+        to_resolve = []
+        for i, mxdomain in enumerate(mxdomains):
+            if in_cache[i * 2]:
                 valid_mxdomain.append(mxdomain)
-            else:
-
-                # DNS resolution
-                try:
-                    answers = resolver.query(mxdomain, rdtype=dns.rdatatype.MX)
-                    if answers:
-                        self.save_mxdomain_in_cache(mxdomain)
-                        valid_mxdomain.append(mxdomain)
-                        # DEBUG
-                        # print('---')
-                        # print(answers.response)
-                        # print(answers.qname)
-                        # print(answers.rdtype)
-                        # print(answers.rdclass)
-                        # print(answers.nameserver)
-                        # print()
-
-                except dns.resolver.NoNameservers:
-                    self.logger.debug('NoNameserver, No non-broken nameservers are available to answer the query.')
-                    print('NoNameserver, No non-broken nameservers are available to answer the query.')
-                except dns.resolver.NoAnswer:
-                    self.logger.debug('NoAnswer, The response did not contain an answer to the question.')
-                    print('NoAnswer, The response did not contain an answer to the question.')
-                except dns.name.EmptyLabel:
-                    self.logger.debug('SyntaxError: EmptyLabel')
-                    print('SyntaxError: EmptyLabel')
-                except dns.resolver.NXDOMAIN:
-                    # save_mxdomain_in_cache(mxdomain)
-                    self.logger.debug('The query name does not exist.')
-                    print('The query name does not exist.')
-                except dns.name.LabelTooLong:
-                    self.logger.debug('The Label is too long')
-                    print('The Label is too long')
-                except dns.exception.Timeout:
-                    print('dns timeout')
-                    # save_mxdomain_in_cache(mxdomain)
-                except Exception as e:
-                    print(e)
+            elif not in_cache[i * 2 + 1]:
+                to_resolve.append(mxdomain)
+
+        # DNS resolution
+        if to_resolve:
+            for mxdomain, res in asyncio.run(self._resolve_mx_records(to_resolve)):
+                if res is True:
+                    self.save_mxdomain_in_cache(mxdomain)
+                    valid_mxdomain.append(mxdomain)
+                elif res:
+                    self.save_invalid_mxdomain_in_cache(mxdomain, res)
         return valid_mxdomain
 
     def extract(self, obj, content, tag, check_mx_record=False):
         extracted = []
         mxdomains = {}
-        mails = self.regex_finditer(self.email_regex, obj.get_global_id(), content)
-        for mail in mails:
-            start, end, value = mail
-            mxdomain = value.rsplit('@', 1)[1].lower()
+        for mail in urls_extractor.get_extracted(obj, content=content)['emails']:
+            mxdomain = mail['domain']
             if mxdomain not in mxdomains:
                 mxdomains[mxdomain] = []
-            mxdomains[mxdomain].append(mail)
+            mxdomains[mxdomain].append((mail['start'], mail['end'], mail['email']))
         if check_mx_record:
             for mx in self.check_mx_record(mxdomains.keys()):
                 for row in mxdomains[mx]:
@@ -141,13 +161,13 @@ class Mail(AbstractModule):
     def compute(self, message):
         item = self.get_obj()
 
-        mails = self.regex_findall(self.email_regex, item.id, item.get_content())
+        mails = urls_extractor.get_extracted(item)['emails']
         mxdomains_email = {}
         for mail in mails:
-            mxdomain = mail.rsplit('@', 1)[1].lower()
+            mxdomain = mail['domain']
             if not mxdomain in mxdomains_email:
                 mxdomains_email[mxdomain] = set()
-            mxdomains_email[mxdomain].add(mail)
+            mxdomains_email[mxdomain].add(mail['email'])
 
             # # TODO: add MAIL trackers
 
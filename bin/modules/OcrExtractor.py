@@ -20,6 +20,8 @@ sys.path.append(os.environ['AIL_BIN'])
 from modules.abstract_module import AbstractModule
 from lib.ConfigLoader import ConfigLoader
 from lib import chats_viewer
+from lib import image_derivatives
+from lib.objects import Images
 from lib.objects import Messages
 from lib.objects import Ocrs
 
@@ -76,6 +78,22 @@ class OcrExtractor(AbstractModule):
 
         self.ocr_languages = Ocrs.get_ocr_languages()
 
+        # EasyOCR readers, kept loaded by languages set
+        if config_loader.has_option('OcrExtractor', 'readers_max_memory'):
+            readers_max_memory = config_loader.get_config_int('OcrExtractor', 'readers_max_memory')
+        else:
+            readers_max_memory = 2048
+        self.ocr_readers = Ocrs.OcrReaders(max_memory=readers_max_memory)
+        if config_loader.has_option('OcrExtractor', 'readers_warmup'):
+            readers_warmup = config_loader.get_config_str('OcrExtractor', 'readers_warmup')
+        else:
+            readers_warmup = 'en'
+        languages_sets = []
+        for languages in readers_warmup.split(';'):
+            languages = {lang.strip() for lang in languages.split(',')}
+            languages_sets.append(Ocrs.sanityze_ocr_languages(languages, ocr_languages=self.ocr_languages))
+        self.ocr_readers.warmup(languages_sets)
+
         # Send module state to logs
         self.logger.info(f'Module {self.module_name} initialized')
 
@@ -85,6 +103,33 @@ class OcrExtractor(AbstractModule):
     def add_to_cache(self):
         self.r_cache.setex(f'ocr:no:{self.obj.id}', 86400, 0)
 
+    def get_ocr_languages(self, image):
+        return Ocrs.sanityze_ocr_languages(get_model_languages(image), ocr_languages=self.ocr_languages)
+
+    def get_near_duplicate_texts(self, image, languages):
+        """
+        Reuse the texts extracted, with the same languages, from an identical image (recompressed, resized)
+
+        :return: list of (bbox, text), None if no near-duplicate was processed
+        """
+        for obj_gid, distance, width, height in image.get_near_duplicates(obj_types={'image'}):
+            image_id = obj_gid.split(':', 2)[2]
+            duplicate = Images.Image(image_id)
+            if self.get_ocr_languages(duplicate) != languages:
+                continue
+            # Same layout, different texts
+            if not image_derivatives.is_same_image(image.get_filepath(), duplicate.get_filepath()):
+                continue
+            ocr = Ocrs.Ocr(image_id)
+            if ocr.exists():
+                _, image_width, image_height = image.get_phash()
+                scale_x = image_width / width
+                scale_y = image_height / height
+                return [([(x * scale_x, y * scale_y) for x, y in bbox], text) for bbox, text in ocr.get_detections()]
+            elif self.r_cache.exists(f'ocr:no:{image_id}'):
+                return []
+        return None
+
     def compute(self, message):
         image = self.get_obj()
         date = message
@@ -98,16 +143,22 @@ class OcrExtractor(AbstractModule):
             return None
 
         if not ocr.exists():
-            path = image.get_filepath()
-            languages = get_model_languages(image)
-            languages = Ocrs.sanityze_ocr_languages(languages, ocr_languages=self.ocr_languages)
-            print(image.id, languages)
-            try:
-                texts = Ocrs.extract_text(path, languages)
-            except (OSError, ValueError, cv2.error) as e:
-                self.logger.warning(e)
-                self.obj.add_tag('infoleak:confirmed="false-positive"')
-                texts = None
+            languages = self.get_ocr_languages(image)
+            texts = self.get_near_duplicate_texts(image, languages)
+            if texts is not None:
+                print(image.id, 'near-duplicate')
+            # flat or blurry image
+            elif not image_derivatives.has_details(image.get_filepath()):
+                texts = []
+            else:
+                path = image.get_filepath()
+                print(image.id, languages)
+                try:
+                    texts = Ocrs.extract_text(path, languages, readers=self.ocr_readers)
+                except (OSError, ValueError, cv2.error) as e:
+                    self.logger.warning(e)
+                    self.obj.add_tag('infoleak:confirmed="false-positive"')
+                    texts = None
             if texts:
                 print('create')
                 ocr = Ocrs.create(image.id, texts)
@@ -23,6 +23,7 @@ sys.path.append(os.environ['AIL_BIN'])
 # Import Project packages
 ##################################
 from modules.abstract_module import AbstractModule
+from lib import numeric_tokens
 from lib.objects.Items import Item
 
 # # TODO: # FIXME:  improve regex / filter false positives
@@ -41,9 +42,22 @@ class Phone(AbstractModule):
         # Waiting time in seconds between to message processed
         self.pending_seconds = 1
 
+    def search_phones(self, content):
+        """
+        Search the international phone numbers in the content windows of the phone candidates.
+        With an unknown country code (ZZ), a phone number starts with a plus sign.
+
+        :return: list of (start, end, value)
+        """
+        phones = []
+        for start, end in numeric_tokens.get_phone_windows(content):
+            for match in phonenumbers.PhoneNumberMatcher(content[start:end], 'ZZ'):
+                phones.append((start + match.start, start + match.end, match.raw_string))
+        return phones
+
     def extract(self, obj, content, tag):
         extracted = []
-        phones = self.regex_phone_iter('ZZ', obj.get_global_id(), content)
+        phones = self.search_phones(content)
         for phone in phones:
             extracted.append([phone[0], phone[1], phone[2], f'tag:{tag}'])
         return extracted
@@ -53,7 +67,7 @@ class Phone(AbstractModule):
         content = item.get_content()
 
         # TODO use language detection to choose the country code ?
-        results = self.regex_phone_iter('ZZ', item.id, content)
+        results = self.search_phones(content)
         for phone in results:
             print(phone[2])
 
@@ -62,7 +76,7 @@ class Phone(AbstractModule):
             tag = 'infoleak:automatic-detection="phone-number"'
             self.add_message_to_queue(message=tag, queue='Tags')
 
-            self.logger.info(f'{self.obj.get_global_id()} contains {len(phone)} Phone numbers')
+            self.logger.info(f'{self.obj.get_global_id()} contains {len(results)} Phone numbers')
 
         # # List of the regex results in the Item, may be null
         # results = self.REG_PHONE.findall(content)
@@ -23,17 +23,20 @@ sys.path.append(os.environ['AIL_BIN'])
 ##################################
 # Import Project packages
 ##################################
-from modules.abstract_module import AbstractModule
-# from lib.ConfigLoader import ConfigLoader
+from modules.abstract_sqli_module import AbstractSQLInjectionModule
 # from lib import Statistics
 
-class SQLInjectionDetection(AbstractModule):
+class SQLInjectionDetection(AbstractSQLInjectionModule):
     """docstring for SQLInjectionDetection module."""
 
     # # TODO: IMPROVE ME
     # Reference: https://github.com/stamparm/maltrail/blob/master/core/settings.py
     SQLI_REGEX = r"information_schema|sysdatabases|sysusers|floor\(rand\(|ORDER BY \d+|\bUNION\s+(ALL\s+)?SELECT\b|\b(UPDATEXML|EXTRACTVALUE)\(|\bCASE[^\w]+WHEN.*THEN\b|\bWAITFOR[^\w]+DELAY\b|\bCONVERT\(|VARCHAR\(|\bCOUNT\(\*\)|\b(pg_)?sleep\(|\bSELECT\b.*\bFROM\b.*\b(WHERE|GROUP|ORDER)\b|\bSELECT \w+ FROM \w+|\b(AND|OR|SELECT)\b.*/\*.*\*/|/\*.*\*/.*\b(AND|OR|SELECT)\b|\b(AND|OR)[^\w]+\d+['\") ]?[=><]['\"( ]?\d+|ODBC;DRIVER|\bINTO\s+(OUT|DUMP)FILE"
 
+    # Prefilter: at least one of these characters or keywords is needed to match SQLI_REGEX
+    SQLI_CHARS_REGEX = re.compile(r"[()*<>;\s]")
+    SQLI_KEYWORDS = ('information_schema', 'sysdatabases', 'sysusers', 'case', 'waitfor', 'select')
+
     def __init__(self):
         super(SQLInjectionDetection, self).__init__()
 
@@ -41,37 +44,45 @@ class SQLInjectionDetection(AbstractModule):
 
         self.logger.info(f"Module: {self.module_name} Launched")
 
-    def compute(self, message):
-        url = message
-
-        if self.is_sql_injection(url):
-            # self.faup.decode(url)
-            # url_parsed = self.faup.get()
+    def detected(self, url):
+        # self.faup.decode(url)
+        # url_parsed = self.faup.get()
 
-            print(f"Detected SQL in URL: {self.obj.get_global_id()}")
-            print(urllib.request.unquote(url))
+        print(f"Detected SQL in URL: {self.obj.get_global_id()}")
+        print(urllib.request.unquote(url))
 
-            # Tag
-            tag = f'infoleak:automatic-detection="sql-injection"'
-            self.add_message_to_queue(message=tag, queue='Tags')
+        # Tag
+        tag = f'infoleak:automatic-detection="sql-injection"'
+        self.add_message_to_queue(message=tag, queue='Tags')
 
-            # statistics
-            # tld = url_parsed['tld']
-            # if tld is not None:
-            #     # # TODO: # FIXME: remove me
-            #     try:
-            #         tld = tld.decode()
-            #     except:
-            #         pass
-            #     date = datetime.now().strftime("%Y%m")
-            #     Statistics.add_module_tld_stats_by_date(self.module_name, date, tld, 1)
+        # statistics
+        # tld = url_parsed['tld']
+        # if tld is not None:
+        #     # # TODO: # FIXME: remove me
+        #     try:
+        #         tld = tld.decode()
+        #     except:
+        #         pass
+        #     date = datetime.now().strftime("%Y%m")
+        #     Statistics.add_module_tld_stats_by_date(self.module_name, date, tld, 1)
 
     # Try to detect if the url passed might be an sql injection by applying the regex
     # defined above on it.
     def is_sql_injection(self, url_parsed):
         line = unquote(url_parsed)
+        if not self.may_be_sql_injection(line):
+            return False
         return re.search(SQLInjectionDetection.SQLI_REGEX, line, re.I) is not None
 
+    def may_be_sql_injection(self, line):
+        if self.SQLI_CHARS_REGEX.search(line):
+            return True
+        line = line.lower()
+        if any(keyword in line for keyword in self.SQLI_KEYWORDS):
+            return True
+        # (AND|OR)[^\w]+\d+['\") ]?[=><]['\"( ]?\d+
+        return '=' in line and ('and' in line or 'or' in line)
+
 
 if __name__ == "__main__":
     module = SQLInjectionDetection()
@@ -34,7 +34,6 @@ sys.path.append(os.environ['AIL_BIN'])
 # Import Project packages
 ##################################
 from modules.abstract_module import AbstractModule
-from lib.objects.Items import Item
 from lib import ConfigLoader
 
 
@@ -59,10 +58,15 @@ class SentimentAnalysis(AbstractModule):
     def __init__(self):
         super(SentimentAnalysis, self).__init__()
 
-        self.sentiment_lexicon_file = ConfigLoader.ConfigLoader().get_config_str("Directories", "sentiment_lexicon_file")
+        config_loader = ConfigLoader.ConfigLoader()
+        self.sentiment_lexicon_file = config_loader.get_config_str("Directories", "sentiment_lexicon_file")
 
         # REDIS_LEVEL_DB #
-        self.db = ConfigLoader.ConfigLoader().get_redis_conn("_Sentiment")
+        self.db = config_loader.get_redis_conn("_Sentiment")
+        config_loader = None
+
+        # Load the VADER lexicon once
+        self.sid = SentimentIntensityAnalyzer(self.sentiment_lexicon_file)
 
         self.time1 = time.time()
 
@@ -83,23 +87,23 @@ class SentimentAnalysis(AbstractModule):
             signal.alarm(0)
 
     def get_p_content_with_removed_lines(self, threshold, item_content):
-        num_line_removed = 0
-        line_length_threshold = threshold
-        string_content = ""
-        f = item_content
-        for line_id, line in enumerate(f):
-            length = len(line)
-
-            if length < line_length_threshold:
-                string_content += line
-            else:
-                num_line_removed += 1
-
-        return num_line_removed, string_content
+        lines = item_content.splitlines(keepends=True)
+        kept_lines = [line for line in lines if len(line) < threshold]
+        return len(lines) - len(kept_lines), ''.join(kept_lines)
+
+    def get_avg_score(self, sentences):
+        scores = [self.sid.polarity_scores(sentence) for sentence in sentences]
+        compounds_neg = [ss['compound'] for ss in scores if ss['neg'] > ss['pos']]
+        compounds_pos = [ss['compound'] for ss in scores if ss['neg'] <= ss['pos']]
+        return {'neg': sum(ss['neg'] for ss in scores) / len(scores),
+                'neu': sum(ss['neu'] for ss in scores) / len(scores),
+                'pos': sum(ss['pos'] for ss in scores) / len(scores),
+                'compoundPos': sum(compounds_pos) / (len(compounds_pos) if compounds_pos else 1),
+                'compoundNeg': sum(compounds_neg) / (len(compounds_neg) if compounds_neg else 1)}
 
     def analyse(self, message):
 
-        item = Item(message)
+        item = self.get_obj()
 
         # get content with removed line + number of them
         num_line_removed, p_content = self.get_p_content_with_removed_lines(SentimentAnalysis.line_max_length_threshold,
@@ -130,46 +134,21 @@ class SentimentAnalysis(AbstractModule):
                 sentences = tokenize.sent_tokenize(p_content)
 
             if len(sentences) > 0:
-                avg_score = {'neg': 0.0, 'neu': 0.0, 'pos': 0.0, 'compoundPos': 0.0, 'compoundNeg': 0.0}
-                neg_line = 0
-                pos_line = 0
-                sid = SentimentIntensityAnalyzer(self.sentiment_lexicon_file)
-                for sentence in sentences:
-                    ss = sid.polarity_scores(sentence)
-                    for k in sorted(ss):
-                        if k == 'compound':
-                            if ss['neg'] > ss['pos']:
-                                avg_score['compoundNeg'] += ss[k]
-                                neg_line += 1
-                            else:
-                                avg_score['compoundPos'] += ss[k]
-                                pos_line += 1
-                        else:
-                            avg_score[k] += ss[k]
-
-
-                for k in avg_score:
-                    if k == 'compoundPos':
-                        avg_score[k] = avg_score[k] / (pos_line if pos_line > 0 else 1)
-                    elif k == 'compoundNeg':
-                        avg_score[k] = avg_score[k] / (neg_line if neg_line > 0 else 1)
-                    else:
-                        avg_score[k] = avg_score[k] / len(sentences)
-
+                avg_score = self.get_avg_score(sentences)
 
                 # In redis-levelDB: {} = set, () = K-V
                 # {Provider_set -> provider_i}
                 # {Provider_TimestampInHour_i -> UniqID_i}_j
                 # (UniqID_i -> PasteValue_i)
 
-                self.db.sadd('Provider_set', provider)
-
                 provider_timestamp = provider + '_' + str(timestamp)
-                self.db.incr('UniqID')
-                UniqID = self.db.get('UniqID')
+                UniqID = self.db.incr('UniqID')
                 self.logger.debug(f'{provider_timestamp}->{UniqID}dropped{num_line_removed}lines')
-                self.db.sadd(provider_timestamp, UniqID)
-                self.db.set(UniqID, avg_score)
+                pipe = self.db.pipeline(transaction=False)
+                pipe.sadd('Provider_set', provider)
+                pipe.sadd(provider_timestamp, UniqID)
+                pipe.set(UniqID, str(avg_score))
+                pipe.execute()
         else:
             self.logger.debug(f'Dropped:{p_MimeType}')
 
@@ -15,15 +15,12 @@ This module extract URLs from an item and send them to others modules.
 import os
 import sys
 
-from pyfaup.faup import Faup
-
 sys.path.append(os.environ['AIL_BIN'])
 ##################################
 # Import Project packages
 ##################################
 from modules.abstract_module import AbstractModule
-from lib.ConfigLoader import ConfigLoader
-from lib.objects.Items import Item
+from lib import urls_extractor
 
 # # TODO: Faup packages: Add new binding: Check TLD
 
@@ -38,23 +35,6 @@ class Urls(AbstractModule):
         """
         super(Urls, self).__init__()
 
-        config_loader = ConfigLoader()
-
-        self.faup = Faup()
-
-        # Protocol file path
-        protocolsfile_path = os.path.join(os.environ['AIL_HOME'],
-                                          config_loader.get_config_str("Directories", "protocolsfile"))
-        # Get all uri from protocolsfile (Used for Curve)
-        uri_scheme = ""
-        with open(protocolsfile_path, 'r') as scheme_file:
-            for scheme in scheme_file:
-                uri_scheme += scheme[:-1]+"|"
-        uri_scheme = uri_scheme[:-1]
-
-        self.url_regex = "((?i:"+uri_scheme + \
-            ")\://(?:[a-zA-Z0-9\.\-]+(?:\:[a-zA-Z0-9\.&%\$\-]+)*@)*(?:(?:25[0-5]|2[0-4][0-9]|[0-1]{1}[0-9]{2}|[1-9]{1}[0-9]{1}|[1-9])\.(?:25[0-5]|2[0-4][0-9]|[0-1]{1}[0-9]{2}|[1-9]{1}[0-9]{1}|[1-9]|0)\.(?:25[0-5]|2[0-4][0-9]|[0-1]{1}[0-9]{2}|[1-9]{1}[0-9]{1}|[1-9]|0)\.(?:25[0-5]|2[0-4][0-9]|[0-1]{1}[0-9]{2}|[1-9]{1}[0-9]{1}|[0-9])|localhost|(?:[a-zA-Z0-9\-]+\.)*[a-zA-Z0-9\-]+\.(?:[a-zA-Z]{2,15}))(?:\:[0-9]+)*(?:/?(?:[a-zA-Z0-9\.\,\?'\\+&%\$#\=~_\-]+))*)"
-
         # Send module state to logs
         self.logger.info(f"Module {self.module_name} initialized")
 
@@ -65,19 +45,11 @@ class Urls(AbstractModule):
         score = message
 
         item = self.get_obj()
-        item_content = item.get_content()
 
         # TODO Handle invalid URL
-        l_urls = self.regex_findall(self.url_regex, item.get_id(), item_content)
+        l_urls = urls_extractor.get_extracted(item)['urls']
         for url in l_urls:
-            self.faup.decode(url)
-            url_decoded = self.faup.get()
-            # decode URL
-            try:
-                url = url_decoded['url'].decode()
-            except AttributeError:
-                url = url_decoded['url']
-
+            url = url['url']
             print(url, self.obj.get_global_id())
             self.add_message_to_queue(message=str(url), queue='Url')
             self.logger.debug(f"url_parsed: {url}")
@@ -63,6 +63,11 @@ class AbstractModule(ABC):
         # Debug Mode
         self.debug = False
 
+        # Maximum number of messages processed at once by compute_batch()
+        self.batch_size = 1
+        # Messages of the current batch already processed, see set_processed()
+        self.batch_processed = set()
+
         if queue:
             self.queue.start()
 
@@ -97,6 +102,22 @@ class AbstractModule(ABC):
         self.obj = None
         return None
 
+    def get_messages(self, nb):
+        """
+        Get up to nb messages from the Redis Queue (QueueIn)
+
+        :return: list of (obj, sha256_mess, message)
+        """
+        messages = []
+        for _ in range(nb):
+            message = self.get_message()
+            if not message and not self.obj:
+                break
+            messages.append((self.obj, self.sha256_mess, message))
+        self.obj = None
+        self.sha256_mess = None
+        return messages
+
     # TODO ADD META OBJ ????
     def add_message_to_queue(self, obj=None, message='', queue=None):
         """
@@ -107,13 +128,30 @@ class AbstractModule(ABC):
 
         ex: add_message_to_queue(item_id, 'Mail')
         """
+        if not obj:
+            obj = self.obj
         if obj:
             obj_global_id = obj.get_global_id()
-        elif self.obj:
-            obj_global_id = self.obj.get_global_id()
         else:
             obj_global_id = '::'
-        self.queue.send_message(obj_global_id, message, queue)
+        self.queue.send_message(obj_global_id, message, queue, obj=obj)
+
+    def add_messages_to_queue(self, messages, obj=None, queue=None):
+        """
+        Add multiple messages of the same object to a queue
+        :param messages: list of messages to send in queue
+        :param obj: AILObject
+        :param queue: queue name or module name
+
+        ex: add_messages_to_queue(tags, queue='Tags')
+        """
+        if not obj:
+            obj = self.obj
+        if obj:
+            obj_global_id = obj.get_global_id()
+        else:
+            obj_global_id = '::'
+        self.queue.send_messages(obj_global_id, messages, queue, obj=obj)
 
     def get_available_queues(self):
         return self.queue.get_out_queues()
@@ -156,47 +194,71 @@ class AbstractModule(ABC):
 
         # Endless loop processing messages from the input queue
         while self.proceed:
-            # Get one message (ex:item id) from the Redis Queue (QueueIn)
-            message = self.get_message()
+            # Process a batch of messages
+            if self.batch_size > 1:
+                messages = self.get_messages(self.batch_size)
+                if messages:
+                    batch = [(obj, message) for obj, _, message in messages]
+                    self.batch_processed = set()
+                    try:
+                        self.compute_batch(batch)
+                    except Exception as err:
+                        self._handle_error(err, f'batch of {len(messages)} messages')
+                        # Don't drop the rest of the batch: process the unprocessed messages one by one
+                        self.compute_each([(obj, message) for obj, message in batch
+                                           if not self.is_processed(obj, message)])
+                    self.batch_processed = set()
+                    for obj, sha256_mess, _ in messages:
+                        if obj:
+                            self.queue.end_message(obj.get_global_id(), sha256_mess)
+                    self.obj = None
+                    continue
 
-            if message or self.obj:
-                try:
-                    # Module processing with the message from the queue
-                    self.compute(message)
-                except Exception as err:
-                    if self.debug:
-                        self.queue.error()
-                        raise err
-
-                    # LOG ERROR
-                    trace = traceback.format_tb(err.__traceback__)
-                    trace = ''.join(trace)
-                    self.logger.critical(f"Error in module {self.module_name}: {__name__} : {err}")
-                    if message:
-                        self.logger.critical(f"Module {self.module_name} input message: {message}")
-                    if self.obj:
-                        self.logger.critical(f"{self.module_name} Obj: {self.obj.get_global_id()}")
-                    self.logger.critical(trace)
+            # Get one message (ex:item id) from the Redis Queue (QueueIn)
+            else:
+                message = self.get_message()
 
-                    if isinstance(err, ModuleQueueError):
-                        self.queue.error()
-                        raise err
-                # remove from set_module
-                ## check if item process == completed
+                if message or self.obj:
+                    try:
+                        # Module processing with the message from the queue
+                        self.compute(message)
+                    except Exception as err:
+                        self._handle_error(err, message)
+                    # remove from set_module
+                    ## check if item process == completed
 
-                if self.obj:
-                    self.queue.end_message(self.obj.get_global_id(), self.sha256_mess)
-                    self.obj = None
-                    self.sha256_mess = None
+                    if self.obj:
+                        self.queue.end_message(self.obj.get_global_id(), self.sha256_mess)
+                        self.obj = None
+                        self.sha256_mess = None
+                    continue
+
+            self.computeNone()
+            # Wait before next process
+            self.logger.debug(f"{self.module_name}, waiting for new message, Idling {self.pending_seconds}s")
+            try:
+                time.sleep(self.pending_seconds)
+            except TimeoutException:
+                pass
+
+    def _handle_error(self, err, message):
+        if self.debug:
+            self.queue.error()
+            raise err
+
+        # LOG ERROR
+        trace = traceback.format_tb(err.__traceback__)
+        trace = ''.join(trace)
+        self.logger.critical(f"Error in module {self.module_name}: {__name__} : {err}")
+        if message:
+            self.logger.critical(f"Module {self.module_name} input message: {message}")
+        if self.obj:
+            self.logger.critical(f"{self.module_name} Obj: {self.obj.get_global_id()}")
+        self.logger.critical(trace)
 
-            else:
-                self.computeNone()
-                # Wait before next process
-                self.logger.debug(f"{self.module_name}, waiting for new message, Idling {self.pending_seconds}s")
-                try:
-                    time.sleep(self.pending_seconds)
-                except TimeoutException:
-                    pass
+        if isinstance(err, ModuleQueueError):
+            self.queue.error()
+            raise err
 
     def _module_name(self):
         """
@@ -211,6 +273,46 @@ class AbstractModule(ABC):
         """
         pass
 
+    def compute_batch(self, messages):
+        """
+        Process a batch of messages, used if batch_size > 1
+        Override it to share work between the messages, call set_processed() once a message is processed:
+        if compute_batch() raises, only the unprocessed messages are processed again, one by one
+
+        :param messages: list of (obj, message)
+        """
+        self.compute_each(messages)
+
+    def _get_processed_key(self, obj, message):
+        if obj:
+            return obj.get_global_id(), message
+        else:
+            return None, message
+
+    def set_processed(self, obj, message):
+        """
+        Mark a message of the current batch as processed
+        """
+        self.batch_processed.add(self._get_processed_key(obj, message))
+
+    def is_processed(self, obj, message):
+        return self._get_processed_key(obj, message) in self.batch_processed
+
+    def compute_each(self, messages):
+        """
+        Process the messages one by one, an error only skips its own message
+
+        :param messages: list of (obj, message)
+        """
+        for obj, message in messages:
+            self.obj = obj
+            try:
+                self.compute(message)
+            except Exception as err:
+                self._handle_error(err, message)
+            self.set_processed(obj, message)
+        self.obj = None
+
     def compute_manual(self, obj, message=None):
         self.obj = obj
         return self.compute(message)
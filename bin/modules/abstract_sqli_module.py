@@ -0,0 +1,87 @@
+# coding: utf-8
+"""
+Base Class for the AIL SQL Injection Modules
+"""
+
+##################################
+# Import External packages
+##################################
+from abc import abstractmethod
+import hashlib
+import os
+import sys
+
+sys.path.append(os.environ['AIL_BIN'])
+##################################
+# Import Project packages
+##################################
+from modules.abstract_module import AbstractModule
+from lib.ConfigLoader import ConfigLoader
+
+class AbstractSQLInjectionModule(AbstractModule):
+    """
+    SQL Injection Module: check the URLs published by the Urls module, by batch
+    """
+
+    # Time to live of the URLs verdicts
+    VERDICT_TTL = 86400
+
+    def __init__(self):
+        super(AbstractSQLInjectionModule, self).__init__()
+
+        config_loader = ConfigLoader()
+        self.r_cache = config_loader.get_redis_conn("Redis_Cache")
+
+        # Number of URLs processed at once when the queue is full
+        if config_loader.has_option(self.module_name, 'batch_size'):
+            self.batch_size = config_loader.get_config_int(self.module_name, 'batch_size')
+        else:
+            self.batch_size = 50
+
+    def compute(self, message):
+        self.compute_batch([(self.obj, message)])
+
+    def compute_batch(self, messages):
+        # Verdicts of the unique URLs of the batch
+        urls = list(dict.fromkeys(message for _, message in messages))
+        verdicts = self.get_verdicts(urls)
+        for obj, url in messages:
+            if verdicts[url]:
+                self.obj = obj
+                self.detected(url)
+            self.set_processed(obj, url)
+        self.obj = None
+
+    def get_verdicts(self, urls):
+        """
+        :return: dict: url: is sql injection, the verdicts are cached by module and URL digest
+        """
+        verdicts = {}
+        digests = [hashlib.sha1(url.encode()).hexdigest() for url in urls]
+        pipe = self.r_cache.pipeline()
+        for digest in digests:
+            pipe.get(f'sqli:{self.module_name}:{digest}')
+        new_verdicts = self.r_cache.pipeline()
+        for url, digest, verdict in zip(urls, digests, pipe.execute()):
+            if verdict is None:
+                verdict = self.is_sql_injection(url)
+                new_verdicts.setex(f'sqli:{self.module_name}:{digest}', self.VERDICT_TTL, int(verdict))
+                verdicts[url] = verdict
+            else:
+                verdicts[url] = verdict == '1'
+        new_verdicts.execute()
+        return verdicts
+
+    @abstractmethod
+    def is_sql_injection(self, url):
+        """
+        :return: True if the URL is a SQL injection
+        """
+        pass
+
+    @abstractmethod
+    def detected(self, url):
+        """
+        Tag the object of the SQL injection URL
+        """
+        pass
@@ -77,14 +77,6 @@ sudo ldconfig
 popd
 popd
 
-# pgpdump
-test ! -d pgpdump && git clone https://github.com/kazu-yamamoto/pgpdump.git
-pushd pgpdump/
-./configure
-make
-sudo make install
-popd
-
 # ARDB #
 test ! -d ardb/ && git clone https://github.com/ail-project/ardb.git
 pushd ardb/
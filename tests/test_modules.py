@@ -2,12 +2,16 @@
 # -*- coding: utf-8 -*-
 
 import os
+import re
 import sys
 import unittest
 
 import gzip
+import json
+import threading
 from base64 import b64encode
 from distutils.dir_util import copy_tree
+from http.server import BaseHTTPRequestHandler, HTTPServer
 
 sys.path.append(os.environ['AIL_BIN'])
 ##################################
@@ -17,15 +21,18 @@ from lib.ConfigLoader import ConfigLoader
 # Modules Classes
 from modules.ApiKey import ApiKey
 from modules.Categ import Categ
+from modules.Credential import Credential
 from modules.CreditCards import CreditCards
 from modules.DomClassifier import DomClassifier
 from modules.Global import Global
-from modules.Keys import Keys
+from modules.Keys import Keys, KeyEnum
 from modules.Onion import Onion
+from modules.PgpDump import PgpDump
 from modules.Telegram import Telegram
 
 # project packages
 import lib.objects.Items as Items
+from lib import Language
 
 #### COPY SAMPLES ####
 config_loader = ConfigLoader()
@@ -71,6 +78,22 @@ class TestModuleCateg(unittest.TestCase):
         self.assertCountEqual(result, test_categ)
 
 
+class TestModuleCredential(unittest.TestCase):
+
+    def setUp(self):
+        self.module = Credential()
+        self.module.debug = True
+
+    def test_combolists(self):
+        test_credentials = ['alice@example.org:password1',
+                            'site.org|bob@example.com|password2',
+                            'https://www.site.org/login:carol@example.net:password3']
+        content = '\n'.join(test_credentials)
+
+        credentials = [match.group() for match in re.finditer(self.module.regex_cred, content)]
+        self.assertEqual(credentials, test_credentials)
+
+
 class TestModuleCreditCards(unittest.TestCase):
 
     def setUp(self):
@@ -152,8 +175,64 @@ class TestModuleKeys(unittest.TestCase):
     def test_module(self):
         item_id = 'tests/2021/01/01/keys.gz'
         self.module.obj = Items.Item(item_id)
-        # # TODO: check results
-        self.module.compute(None)
+        keys = self.module.compute(None, r_result=True)
+        self.assertEqual(keys, {KeyEnum.CERTIFICATE: [0], KeyEnum.PGP_MESSAGE: [83]})
+
+
+class FakeTranslationHandler(BaseHTTPRequestHandler):
+    requests = []
+
+    def do_POST(self):
+        params = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        self.requests.append(params)
+        # untranslated segments are returned unchanged
+        translations = [f'{params["target"]}: {q}' if q != 'OK' else q for q in params['q']]
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.end_headers()
+        self.wfile.write(json.dumps({'translatedText': translations}).encode())
+
+    def log_message(self, *args):
+        pass
+
+
+class TestLanguageTranslator(unittest.TestCase):
+
+    def setUp(self):
+        self.server = HTTPServer(('127.0.0.1', 0), FakeTranslationHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.translator_url = Language.TRANSLATOR_URL
+        Language.TRANSLATOR_URL = f'http://127.0.0.1:{self.server.server_port}/'
+        self.translator = Language.LanguageTranslator()
+        self.languages = dict(Language.LIST_LANGUAGES)
+        Language.LIST_LANGUAGES.update({'en': 'English', 'fr': 'French'})
+        Language.r_lang.delete('translations:fr:en')
+        FakeTranslationHandler.requests = []
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        Language.TRANSLATOR_URL = self.translator_url
+        Language.LIST_LANGUAGES.clear()
+        Language.LIST_LANGUAGES.update(self.languages)
+        Language.r_lang.delete('translations:fr:en')
+
+    def test_translate_batch(self):
+        contents = ['Bonjour', 'Salut', 'Bonjour', 'OK', '']
+        expected = [('fr', 'en: Bonjour'), ('fr', 'en: Salut'), ('fr', 'en: Bonjour'), ('fr', None), ('fr', None)]
+        translations = self.translator.translate_batch(contents, sources=['fr'] * len(contents), target='en')
+        self.assertEqual(translations, expected)
+        # one request, unique segments
+        self.assertEqual(len(FakeTranslationHandler.requests), 1)
+        self.assertEqual(FakeTranslationHandler.requests[0]['q'], ['Bonjour', 'Salut', 'OK'])
+
+        # stored translations
+        translations = self.translator.translate_batch(contents, sources=['fr'] * len(contents), target='en')
+        self.assertEqual(translations, expected)
+        self.assertEqual(len(FakeTranslationHandler.requests), 1)
+
+        self.assertEqual(self.translator.translate('Merci', source='fr', target='en'), ('fr', 'en: Merci'))
+        self.assertEqual(len(FakeTranslationHandler.requests), 2)
 
 
 class TestModuleOnion(unittest.TestCase):
@@ -171,6 +250,23 @@ class TestModuleOnion(unittest.TestCase):
         self.module.compute(f'3')
 
 
+class TestModulePgpDump(unittest.TestCase):
+
+    def setUp(self):
+        self.module = PgpDump()
+        self.module.debug = True
+
+    def test_module(self):
+        item_id = 'tests/2021/01/01/pgp.gz'
+        self.module.obj = Items.Item(item_id)
+        self.module.compute(None)
+        self.assertCountEqual(self.module.keys, {'0x0322EEF532BFE6E7', '0x1743BC3A58ACC933', '0x4335561C82DABC06'})
+        self.assertCountEqual(self.module.private_keys, {'0x1743BC3A58ACC933', '0x4335561C82DABC06'})
+        self.assertCountEqual(self.module.names, {'Alice Test', 'Bob', 'Bob Two'})
+        self.assertCountEqual(self.module.mails, {'alice@example.com', 'bob@example.org', 'bob2@example.net'})
+        self.assertTrue(self.module.symmetrically_encrypted)
+
+
 class TestModuleTelegram(unittest.TestCase):
 
     def setUp(self):
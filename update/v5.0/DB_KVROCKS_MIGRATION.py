@@ -16,6 +16,7 @@ sys.path.append(os.environ['AIL_BIN'])
 # Import Project packages
 ##################################
 from lib.ConfigLoader import ConfigLoader
+from lib import Duplicate
 from lib import Tag
 from lib import ail_users
 from lib.objects import Decodeds
@@ -371,12 +372,13 @@ def items_migration():
             for date in Date.get_date_range_today(tag_first):
                 print(date)
                 for item_id in get_all_items_tags_by_day(tag, date):
-                    item = Items.Item(item_id)
                     duplicates_dict = get_item_duplicates_dict(item_id)
-                    for id_2 in duplicates_dict:
-                        for algo in duplicates_dict[id_2]:
-                            print(algo, duplicates_dict[id_2][algo], id_2)
-                            item.add_duplicate(algo, duplicates_dict[id_2][algo], id_2)
+                    if duplicates_dict:
+                        item = Items.Item(item_id)
+                        content = item.get_content()
+                        hashs = {'ssdeep': Duplicate.get_ssdeep_hash(content), 'tlsh': Duplicate.get_tlsh_hash(content)}
+                        similar = {id_2: max(duplicates_dict[id_2].values()) for id_2 in duplicates_dict}
+                        Duplicate.add_obj_to_cluster('item', '', item_id, hashs, similar)
 
     # ITEM FIRST/LAST DATE
     Items._manual_set_items_date_first_last()
@@ -23,6 +23,20 @@ def no_cache(func):
         resp.headers['Pragma'] = 'no-cache'
         return resp
     return decorated_view
+
+def private_cache(max_age=604800):
+    """
+    Cache the content addressed files (images, screenshots, favicons) in the browser only
+    """
+    def decorator(func):
+        @wraps(func)
+        def decorated_view(*args, **kwargs):
+            resp = make_response(func(*args, **kwargs))
+            if resp.status_code in (200, 304):
+                resp.headers['Cache-Control'] = f'private, max-age={max_age}, immutable'
+            return resp
+        return decorated_view
+    return decorator
 ###############################################################
 ###############################################################
 ###############################################################
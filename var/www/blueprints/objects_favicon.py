@@ -12,12 +12,13 @@ from flask import Flask, render_template, jsonify, request, Blueprint, redirect,
 from flask_login import login_required
 
 # Import Role_Manager
-from Role_Manager import login_admin, login_read_only, no_cache
+from Role_Manager import login_admin, login_read_only, private_cache
 
 sys.path.append(os.environ['AIL_BIN'])
 ##################################
 # Import Project packages
 ##################################
+from lib import image_derivatives
 from lib.objects import Favicons
 from packages import Date
 
@@ -32,7 +33,7 @@ bootstrap_label = ['primary', 'success', 'danger', 'warning', 'info']
 @objects_favicon.route('/favicon/<path:filename>')
 @login_required
 @login_read_only
-@no_cache
+@private_cache()
 def favicon(filename):
     if not filename:
         abort(404)
@@ -40,6 +41,10 @@ def favicon(filename):
         abort(404)
     filename = filename.replace('/', '')
     fav = Favicons.Favicon(filename)
+    size = request.args.get('size')
+    if size in image_derivatives.DERIVATIVES and fav.get_derivative(size):
+        return send_from_directory(Favicons.FAVICON_FOLDER, image_derivatives.get_derivative_filepath(fav.get_rel_path(), size),
+                                   as_attachment=False, mimetype='image/webp')
     return send_from_directory(Favicons.FAVICON_FOLDER, fav.get_rel_path(), as_attachment=False, mimetype='image')
 
 
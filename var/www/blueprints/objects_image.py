@@ -12,12 +12,13 @@ from flask import Flask, render_template, jsonify, request, Blueprint, redirect,
 from flask_login import login_required
 
 # Import Role_Manager
-from Role_Manager import login_admin, login_read_only, no_cache
+from Role_Manager import login_admin, login_read_only, private_cache
 
 sys.path.append(os.environ['AIL_BIN'])
 ##################################
 # Import Project packages
 ##################################
+from lib import image_derivatives
 from lib.objects import Images
 from packages import Date
 
@@ -32,7 +33,7 @@ bootstrap_label = ['primary', 'success', 'danger', 'warning', 'info']
 @objects_image.route('/image/<path:filename>')
 @login_required
 @login_read_only
-@no_cache
+@private_cache()
 def image(filename):
     if not filename:
         abort(404)
@@ -40,6 +41,10 @@ def image(filename):
         abort(404)
     filename = filename.replace('/', '')
     image = Images.Image(filename)
+    size = request.args.get('size')
+    if size in image_derivatives.DERIVATIVES and image.get_derivative(size):
+        return send_from_directory(Images.IMAGE_FOLDER, image_derivatives.get_derivative_filepath(image.get_rel_path(), size),
+                                   as_attachment=False, mimetype='image/webp')
     return send_from_directory(Images.IMAGE_FOLDER, image.get_rel_path(), as_attachment=False, mimetype='image')
 
 
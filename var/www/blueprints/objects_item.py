@@ -13,7 +13,7 @@ from flask import Flask, render_template, jsonify, request, Blueprint, redirect,
 from flask_login import login_required, current_user
 
 # Import Role_Manager
-from Role_Manager import login_admin, login_user, login_read_only, no_cache
+from Role_Manager import login_admin, login_user, login_read_only, private_cache
 
 sys.path.append(os.environ['AIL_BIN'])
 ##################################
@@ -21,6 +21,7 @@ sys.path.append(os.environ['AIL_BIN'])
 ##################################
 from lib import ConfigLoader
 from lib import chats_viewer
+from lib import image_derivatives
 from lib import item_basic
 from lib.objects.Items import Item
 from lib.objects.Screenshots import Screenshot
@@ -49,7 +50,7 @@ config_loader = None
 @objects_item.route('/screenshot/<path:filename>')
 @login_required
 @login_read_only
-@no_cache
+@private_cache()
 def screenshot(filename):
     if not filename:
         abort(404)
@@ -57,6 +58,10 @@ def screenshot(filename):
         abort(404)
     filename = filename.replace('/', '')
     s = Screenshot(filename)
+    size = request.args.get('size')
+    if size in image_derivatives.DERIVATIVES and s.get_derivative(size):
+        return send_from_directory(SCREENSHOT_FOLDER, image_derivatives.get_derivative_filepath(s.get_rel_path(add_extension=True), size),
+                                   as_attachment=False, mimetype='image/webp')
     return send_from_directory(SCREENSHOT_FOLDER, s.get_rel_path(add_extension=True), as_attachment=False, mimetype='image')
 
 @objects_item.route("/object/item")